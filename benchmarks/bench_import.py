@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""
+Замер времени импорта пакета в новом процессе и проверка, что импорт не загружает необязательные зависимости.
+По умолчанию замеряются импорт пакета и импорт клиента, --statement можно указать несколько раз.
+Код возврата 1, если для одной из инструкций загружен один из модулей HEAVY_MODULES или медиана превышает --budget.
+
+Запуск: python benchmarks/bench_import.py [--runs 20] [--statement "import merchantapi_client"] [--budget 0.03]
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+HEAVY_MODULES = ['json', 'hmac', 'hashlib', 'email.utils', 'xml.etree.ElementTree', 'dateutil', 'dateutil.tz',
+                 'http.client', 'httplib', 'urllib.parse',
+                 'merchantapi_client.Entities']
+
+# Импорт пакета и импорт клиента, которым пользуется большинство вызывающего кода
+STATEMENTS = ['import merchantapi_client', 'from merchantapi_client import MerchantAPI']
+
+PROBE = '''
+import sys, time
+started = time.time()
+%s
+elapsed = time.time() - started
+print(elapsed)
+print(' '.join(name for name in %r if name in sys.modules))
+'''
+
+
+def measure(statement):
+    output = subprocess.check_output([sys.executable, '-c', PROBE % (statement, HEAVY_MODULES)], cwd=ROOT)
+    lines = output.decode().split('\n')
+    return float(lines[0]), lines[1].split()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=20)
+    parser.add_argument('--statement', action='append', dest='statements')
+    parser.add_argument('--budget', type=float, default=0.03, help='maximum median import time in seconds')
+    args = parser.parse_args()
+
+    code = 0
+    for statement in args.statements or STATEMENTS:
+        times = []
+        loaded = []
+        for _ in range(args.runs):
+            elapsed, loaded = measure(statement)
+            times.append(elapsed)
+        times.sort()
+        median = times[len(times) // 2]
+        print('%-45s median %6.2f ms  min %6.2f ms  max %6.2f ms' % (statement, median * 1000, times[0] * 1000,
+                                                                     times[-1] * 1000))
+        if loaded:
+            print('loaded eagerly: %s' % ', '.join(loaded))
+        if loaded or median > args.budget:
+            code = 1
+    return code
+
+
+if __name__ == '__main__':
+    sys.exit(main())
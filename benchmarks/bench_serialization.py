@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""
+Замер масштабирования параллельной сериализации товаров по количеству процессов.
+
+Запуск: python benchmarks/bench_serialization.py [--offers 400000] [--chunk-size 5000] [--data-type xml]
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from merchantapi_client.serialization import ParallelSerializer, get_offers_body, _chunks
+
+
+def make_offers(count):
+    return [{
+        'yml_id': 1,
+        'own_id': 'own-%d' % i,
+        'time': '2014-01-01 00:00:00',
+        'available': bool(i % 2),
+        'stock': i % 100,
+        'price': 100.5 + i
+    } for i in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--offers', type=int, default=400000)
+    parser.add_argument('--chunk-size', type=int, default=5000)
+    parser.add_argument('--data-type', choices=['json', 'xml'], default='xml')
+    args = parser.parse_args()
+    offers = make_offers(args.offers)
+
+    started = time.time()
+    size = sum(len(get_offers_body(args.data_type, chunk)) for chunk in _chunks(offers, args.chunk_size))
+    serial = time.time() - started
+    print('%-12s %8.2fs  %6.1f MB' % ('in-process', serial, size / 1e6))
+
+    processes = 1
+    while processes <= multiprocessing.cpu_count():
+        serializer = ParallelSerializer(processes)
+        started = time.time()
+        size = sum(len(body) for body, _ in serializer.iter_offer_bodies(args.data_type, offers, args.chunk_size))
+        elapsed = time.time() - started
+        serializer.close()
+        print('%-12s %8.2fs  %6.1f MB  x%.2f' % ('%d process%s' % (processes, 'es' if processes > 1 else ''),
+                                               elapsed, size / 1e6, serial / elapsed))
+        processes *= 2
+
+
+if __name__ == '__main__':
+    main()
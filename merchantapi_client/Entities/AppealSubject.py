@@ -0,0 +1,14 @@
+# -*- coding: utf-8 -*-
+
+from .ResponseEntity import ResponseEntity, Field
+
+
+class AppealSubject(ResponseEntity):
+    """
+    Причина претензии по заказу. Ответ метода method_get_subject_appeal
+    """
+
+    _list_key = 'subjects'
+
+    id = Field('id')
+    name = Field('name')
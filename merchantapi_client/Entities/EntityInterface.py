@@ -1,10 +1,68 @@
 # -*- coding: utf-8 -*-
+from itertools import count
 
 
-class EntityInterface:
+# Общий счетчик изменений и экземпляров сущностей. Версия поддерева сравнивается
+# с версией, при которой было сериализовано тело запроса
+_modifications = count(1)
+
+
+class EntityInterface(object):
+
+    _modified = 0
+    _serial = None
+    _serialized = None
+
     @property
     def get_attributes(self):
         """
         :rtype: dict
         """
-        raise NotImplementedError
\ No newline at end of file
+        raise NotImplementedError
+
+    def _touch(self):
+        """
+        Отмечает сущность измененной. Вызывается из сеттеров и методов добавления вложенных сущностей
+        """
+        self._modified = next(_modifications)
+
+    def _get_children(self):
+        """
+        :rtype: list of EntityInterface
+        """
+        return []
+
+    def get_version(self):
+        """
+        Возвращает версию поддерева: номера изменений и состав вложенных сущностей. Добавление или удаление
+        вложенной сущности напрямую через список (например, items.append) меняет версию без вызова сеттера
+        :rtype: tuple
+        """
+        if self._serial is None:
+            self._serial = next(_modifications)
+        return self._serial, self._modified, tuple(child.get_version() for child in self._get_children())
+
+    def is_dirty(self, data_type):
+        """
+        Проверяет, изменялась ли сущность после последней сериализации в формат data_type
+        :type data_type: str
+        :rtype: bool
+        """
+        serialized = (self._serialized or {}).get(data_type)
+        return serialized is None or serialized[0] != self.get_version()
+
+    def get_serialized(self, data_type, serializer):
+        """
+        Возвращает закешированное тело запроса и его MD5 для формата data_type.
+        Тело пересчитывается только после изменения сущности
+        :type data_type: str
+        :param serializer: Функция, возвращающая кортеж (тело, MD5 тела) для сущности
+        :rtype: tuple
+        """
+        version = self.get_version()
+        serialized = (self._serialized or {}).get(data_type)
+        if serialized is None or serialized[0] != version:
+            serialized = (version,) + tuple(serializer(self))
+            self._serialized = dict(self._serialized or {})
+            self._serialized[data_type] = serialized
+        return serialized[1], serialized[2]
@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+
+from .ResponseEntity import ResponseEntity, Field, parse_datetime
+from .OrderItem import OrderItem
+from .OrderCustomer import OrderCustomer
+from .OrderDeliveryAddress import OrderDeliveryAddress
+
+
+class Order(ResponseEntity):
+    """
+    Заказ. Ответ методов method_get_order и method_get_order_list
+    """
+
+    _list_key = 'orders'
+
+    id = Field('id')
+    status = Field('status')
+    delivery_status = Field('deliveryStatus')
+    created_time = Field('createdTime', converter=parse_datetime)
+    updated_time = Field('updatedTime', converter=parse_datetime)
+    total_price = Field('totalPrice')
+    delivery_price = Field('deliveryPrice')
+    delivery_variant_id = Field('deliveryVariantID')
+    payment_type_id = Field('paymentTypeID')
+    comment = Field('comment')
+    customer = Field('customer', entity=OrderCustomer)
+    delivery_address = Field('deliveryAddress', entity=OrderDeliveryAddress)
+    items = Field('items', entity=OrderItem, many=True)
+
+    @classmethod
+    def from_response(cls, response):
+        """
+        :type response: merchantapi_client.client.Response
+        :rtype: Order
+        :raise: ValueError
+        """
+        data = response.get_data()
+        if isinstance(data, dict) and isinstance(data.get('order'), dict):
+            data = data['order']
+        return cls(data)
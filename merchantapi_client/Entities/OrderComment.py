@@ -0,0 +1,16 @@
+# -*- coding: utf-8 -*-
+
+from .ResponseEntity import ResponseEntity, Field, parse_datetime
+
+
+class OrderComment(ResponseEntity):
+    """
+    Комментарий к заказу. Ответ метода method_order_get_comments
+    """
+
+    _list_key = 'comments'
+
+    id = Field('id')
+    text = Field('text')
+    author = Field('author')
+    created_time = Field('createdTime', converter=parse_datetime)
@@ -0,0 +1,13 @@
+# -*- coding: utf-8 -*-
+
+from .ResponseEntity import ResponseEntity, Field
+
+
+class OrderCustomer(ResponseEntity):
+    """
+    Покупатель, оформивший заказ
+    """
+
+    name = Field('name')
+    phone = Field('phone')
+    email = Field('email')
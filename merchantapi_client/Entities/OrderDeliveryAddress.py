@@ -0,0 +1,18 @@
+# -*- coding: utf-8 -*-
+
+from .ResponseEntity import ResponseEntity, Field
+
+
+class OrderDeliveryAddress(ResponseEntity):
+    """
+    Адрес доставки заказа
+    """
+
+    zipcode = Field('zipcode')
+    country = Field('country')
+    region = Field('region')
+    city = Field('city')
+    street = Field('street')
+    house = Field('house')
+    flat = Field('flat')
+    comment = Field('comment')
@@ -0,0 +1,18 @@
+# -*- coding: utf-8 -*-
+
+from .ResponseEntity import ResponseEntity, Field
+
+
+class OrderItem(ResponseEntity):
+    """
+    Товарная позиция заказа
+    """
+
+    _list_key = 'items'
+
+    id = Field('id')
+    yml_id = Field('ymlID')
+    own_id = Field('ownID')
+    name = Field('name')
+    price = Field('price')
+    quantity = Field('quantity')
@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+
+from .ResponseEntity import ResponseEntity, Field
+from .OrderPackageState import OrderPackageState
+from .PostPackageItem import PostPackageItem
+
+
+def _to_package_item(data):
+    """
+    :type data: dict
+    :rtype: PostPackageItem
+    """
+    return PostPackageItem(data.get('name', ''), data.get('quantity', 1))
+
+
+class OrderPackage(ResponseEntity):
+    """
+    Отправление заказа. Ответ метода method_get_order_packages
+    """
+
+    _list_key = 'packages'
+
+    id = Field('id')
+    service = Field('service')
+    package_id = Field('packageId')
+    states = Field('states', entity=OrderPackageState, many=True)
+    items = Field('items', entity=_to_package_item, many=True)
@@ -0,0 +1,14 @@
+# -*- coding: utf-8 -*-
+
+from .ResponseEntity import ResponseEntity, Field, parse_datetime
+
+
+class OrderPackageState(ResponseEntity):
+    """
+    Состояние отправления
+    """
+
+    _list_key = 'states'
+
+    state = Field('state')
+    update_time = Field('updateTime', converter=parse_datetime)
@@ -0,0 +1,16 @@
+# -*- coding: utf-8 -*-
+
+from .ResponseEntity import ResponseEntity, Field, parse_datetime
+
+
+class OrderStatus(ResponseEntity):
+    """
+    Запись истории смены статусов заказа. Ответ метода method_get_order_status_history
+    """
+
+    _list_key = 'statuses'
+
+    status = Field('status')
+    reason_id = Field('reasonID')
+    comment = Field('comment')
+    date = Field('date', converter=parse_datetime)
@@ -0,0 +1,15 @@
+# -*- coding: utf-8 -*-
+
+from .ResponseEntity import ResponseEntity, Field
+
+
+class OrderStatusReason(ResponseEntity):
+    """
+    Причина смены статуса заказа
+    """
+
+    _list_key = 'reasons'
+
+    id = Field('id')
+    code = Field('code')
+    name = Field('name')
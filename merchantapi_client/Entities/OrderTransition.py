@@ -0,0 +1,15 @@
+# -*- coding: utf-8 -*-
+
+from .ResponseEntity import ResponseEntity, Field
+from .OrderStatusReason import OrderStatusReason
+
+
+class OrderTransition(ResponseEntity):
+    """
+    Возможный переход статуса заказа. Ответ метода method_get_order_status_reasons
+    """
+
+    _list_key = 'transitions'
+
+    status = Field('status')
+    reasons = Field('reasons', entity=OrderStatusReason, many=True)
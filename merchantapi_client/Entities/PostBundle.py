@@ -7,7 +7,7 @@ from .PostBundleSlot import PostBundleSlot
 class PostBundle(EntityInterface):
 
     def __init__(self, name=None, description=None, is_available=None, start_time=None,
-                 end_time=None, bonus_type=None, bonus_amount=None, slots=[]):
+                 end_time=None, bonus_type=None, bonus_amount=None, slots=None):
         self._name = name
         self._description = description
         self._is_available = is_available
@@ -15,13 +15,14 @@ class PostBundle(EntityInterface):
         self._end_time = end_time
         self._bonus_type = bonus_type
         self._bonus_amount = bonus_amount
-        self._slots = slots
+        self._slots = slots if slots is not None else []
 
     def add_slot(self, slot):
         """
         :type slot: PostBundleSlot
         """
         self._slots.append(slot)
+        self._touch()
 
     @property
     def bonus_amount(self):
@@ -36,6 +37,7 @@ class PostBundle(EntityInterface):
         :type bonus_amount: float
         """
         self._bonus_amount = bonus_amount
+        self._touch()
 
     @property
     def bonus_type(self):
@@ -50,6 +52,7 @@ class PostBundle(EntityInterface):
         :param bonus_type: str
         """
         self._bonus_type = bonus_type
+        self._touch()
 
     @property
     def description(self):
@@ -64,6 +67,7 @@ class PostBundle(EntityInterface):
         :param description: str
         """
         self._description = description
+        self._touch()
 
     @property
     def end_time(self):
@@ -78,6 +82,7 @@ class PostBundle(EntityInterface):
         :type end_time: str
         """
         self._end_time = end_time
+        self._touch()
 
     @property
     def start_time(self):
@@ -92,6 +97,7 @@ class PostBundle(EntityInterface):
         :type start_time: str
         """
         self._start_time = start_time
+        self._touch()
 
     @property
     def is_available(self):
@@ -106,6 +112,7 @@ class PostBundle(EntityInterface):
         :type is_available: bool
         """
         self._is_available = is_available
+        self._touch()
 
     @property
     def name(self):
@@ -120,6 +127,7 @@ class PostBundle(EntityInterface):
         :type name: str
         """
         self._name = name
+        self._touch()
 
     @property
     def slots(self):
@@ -137,6 +145,13 @@ class PostBundle(EntityInterface):
             if not isinstance(slot, PostBundleSlot):
                 raise ValueError('Elements of \'%s\' must be instance of PostBundleSlot' % slots)
         self._slots = slots
+        self._touch()
+
+    def _get_children(self):
+        """
+        :rtype: list of PostBundleSlot
+        """
+        return self._slots
 
     def get_attributes(self):
         """
@@ -7,11 +7,11 @@ from .PostBundleSlotOffer import PostBundleSlotOffer
 class PostBundleSlot(EntityInterface):
 
     def __init__(self, is_anchor=None, bonus_type=None, bonus_amount=None,
-                 offers=[]):
+                 offers=None):
         self._is_anchor = is_anchor
         self._bonus_type = bonus_type
         self._bonus_amount = bonus_amount
-        self._offers = offers
+        self._offers = offers if offers is not None else []
 
     def add_offer(self, offer):
         """
@@ -19,6 +19,7 @@ class PostBundleSlot(EntityInterface):
         :type offer: PostBundleSlotOffer
         """
         self._offers.append(offer)
+        self._touch()
 
     @property
     def bonus_amount(self):
@@ -33,6 +34,7 @@ class PostBundleSlot(EntityInterface):
         :type bonus_amount: float
         """
         self._bonus_amount = bonus_amount
+        self._touch()
 
     @property
     def bonus_type(self):
@@ -47,6 +49,7 @@ class PostBundleSlot(EntityInterface):
         :type bonus_type: str
         """
         self._bonus_type = bonus_type
+        self._touch()
 
     @property
     def is_anchor(self):
@@ -61,6 +64,7 @@ class PostBundleSlot(EntityInterface):
         :type is_anchor: bool
         """
         self._is_anchor = is_anchor
+        self._touch()
 
     @property
     def offers(self):
@@ -78,6 +82,13 @@ class PostBundleSlot(EntityInterface):
             if not isinstance(offer, PostBundleSlotOffer):
                 raise ValueError('Elements of \'%s\' must be instance of PostBundleSlotOffer' % offers)
         self._offers = offers
+        self._touch()
+
+    def _get_children(self):
+        """
+        :rtype: list of PostBundleSlotOffer
+        """
+        return self._offers
 
     def get_attributes(self):
         """
@@ -22,6 +22,7 @@ class PostBundleSlotOffer(EntityInterface):
         :type own_id: int
         """
         self._own_id = str(own_id)
+        self._touch()
 
     @property
     def yml_id(self):
@@ -36,6 +37,7 @@ class PostBundleSlotOffer(EntityInterface):
         :type yml_id: int
         """
         self._yml_id = int(yml_id)
+        self._touch()
 
     def get_attributes(self):
         """
@@ -9,7 +9,7 @@ class PostPackage(EntityInterface):
     def __init__(self, service=None, package_id=None, items=None):
         self._service = service
         self._package_id = package_id
-        self._items = items
+        self._items = items if items is not None else []
 
     @property
     def items(self):
@@ -28,12 +28,14 @@ class PostPackage(EntityInterface):
                 raise ValueError('Elements of \'%s\' must be instance of PostPackageItem'
                                  % items)
         self._items = items
+        self._touch()
 
     def add_item(self, item):
         """
         :type item: PostPackageItem
         """
         self._items.append(item)
+        self._touch()
 
     @property
     def package_id(self):
@@ -48,6 +50,7 @@ class PostPackage(EntityInterface):
         :type package_id: int
         """
         self._package_id = package_id
+        self._touch()
 
     @property
     def service(self):
@@ -62,6 +65,13 @@ class PostPackage(EntityInterface):
         :type service: str
         """
         self._service = service
+        self._touch()
+
+    def _get_children(self):
+        """
+        :rtype: list of PostPackageItem
+        """
+        return self._items
 
     def get_attributes(self):
         """
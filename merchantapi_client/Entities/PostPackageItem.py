@@ -12,8 +12,38 @@ class PostPackageItem(EntityInterface):
         :param quantity: Количество
         :type quantity: int
         """
-        self.name = name
-        self.quantity = quantity
+        self._name = name
+        self._quantity = quantity
+
+    @property
+    def name(self):
+        """
+        :rtype: str
+        """
+        return self._name
+
+    @name.setter
+    def name(self, name):
+        """
+        :type name: str
+        """
+        self._name = name
+        self._touch()
+
+    @property
+    def quantity(self):
+        """
+        :rtype: int
+        """
+        return self._quantity
+
+    @quantity.setter
+    def quantity(self, quantity):
+        """
+        :type quantity: int
+        """
+        self._quantity = quantity
+        self._touch()
 
     def get_attributes(self):
         """
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+
+
+def parse_datetime(value):
+    """
+    Разбирает дату из ответа API
+    :type value: str
+    :rtype: datetime
+    """
+    from dateutil.parser import parse
+    return parse(value)
+
+
+class Field(object):
+    """
+    Поле сущности ответа. Значение вычисляется при первом обращении и кешируется в экземпляре,
+    вложенные структуры до этого момента остаются исходными словарями.
+    """
+
+    def __init__(self, key, entity=None, many=False, converter=None):
+        """
+        :param key: Ключ в данных ответа
+        :type key: str
+        :param entity: Класс вложенной сущности
+        :type entity: type
+        :param many: Значение является списком сущностей
+        :type many: bool
+        :param converter: Функция преобразования скалярного значения
+        """
+        self._key = key
+        self._entity = entity
+        self._many = many
+        self._converter = converter
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        materialized = instance._materialized
+        if self._key in materialized:
+            return materialized[self._key]
+        value = instance.get_data().get(self._key)
+        if value is not None:
+            if self._entity is not None:
+                if self._many:
+                    value = [self._entity(item) for item in value]
+                else:
+                    value = self._entity(value)
+            elif self._converter is not None:
+                value = self._converter(value)
+        materialized[self._key] = value
+        return value
+
+
+class ResponseEntity(object):
+    """
+    Базовый класс сущностей, получаемых в ответах API
+    """
+
+    # Ключ, под которым список сущностей лежит в ответе
+    _list_key = None
+
+    def __init__(self, data):
+        """
+        :param data: Декодированные данные ответа
+        :type data: dict
+        """
+        if not isinstance(data, dict):
+            raise ValueError('Argument \'%s\' must be dict' % data)
+        self._data = data
+        self._materialized = {}
+
+    def get_data(self):
+        """
+        Возвращает исходные данные сущности
+        :rtype: dict
+        """
+        return self._data
+
+    def get(self, key, default=None):
+        """
+        Возвращает исходное значение поля без преобразования
+        :type key: str
+        """
+        return self._data.get(key, default)
+
+    @classmethod
+    def from_response(cls, response):
+        """
+        Создает сущность по ответу API
+        :type response: merchantapi_client.client.Response
+        :raise: ValueError
+        """
+        return cls(response.get_data())
+
+    @classmethod
+    def list_from_response(cls, response):
+        """
+        Создает список сущностей по ответу API
+        :type response: merchantapi_client.client.Response
+        :rtype: list
+        :raise: ValueError
+        """
+        return cls.list_from_data(response.get_data())
+
+    @classmethod
+    def list_from_data(cls, data):
+        """
+        :type data: dict or list
+        :rtype: list
+        :raise: ValueError
+        """
+        if isinstance(data, dict) and cls._list_key is not None:
+            data = data.get(cls._list_key, [])
+        if not isinstance(data, list):
+            raise ValueError('Response data must be decoded JSON list or dict with key \'%s\'' % cls._list_key)
+        return [cls(item) for item in data]
+
+    def __repr__(self):
+        return '<%s %r>' % (self.__class__.__name__, self._data)
@@ -0,0 +1,16 @@
+# -*- coding: utf-8 -*-
+from .MerchantAPIException import MerchantAPIException
+
+
+class MerchantAPICircuitOpenException(MerchantAPIException):
+    """
+    Запрос отклонен без отправки: группа методов API признана неработоспособной или перегружена
+    """
+
+    def __init__(self, group, message=None):
+        """
+        :param group: Группа методов API
+        :type group: str
+        """
+        MerchantAPIException.__init__(self, message or 'Circuit for \'%s\' is open' % group)
+        self.group = group
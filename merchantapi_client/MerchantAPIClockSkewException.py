@@ -0,0 +1,16 @@
+# -*- coding: utf-8 -*-
+from .MerchantAPIException import MerchantAPIException
+
+
+class MerchantAPIClockSkewException(MerchantAPIException):
+    """
+    Запрос отклонен при аутентификации из-за расхождения локальных часов с часами сервера
+    """
+
+    def __init__(self, skew, message=None):
+        """
+        :param skew: Расхождение часов сервера и подписи запроса в секундах
+        :type skew: float
+        """
+        MerchantAPIException.__init__(self, message or 'Request date differs from server time by %.1f seconds' % skew)
+        self.skew = skew
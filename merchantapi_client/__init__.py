@@ -1,4 +1,27 @@
-__all__ = ["MerchantAPI"]
-from .client import MerchantAPI
-from .client import Response
+# -*- coding: utf-8 -*-
+import sys
 
+__all__ = ["MerchantAPI", "MerchantAPIPool", "Response"]
+
+# Модули загружаются при первом обращении, чтобы импорт пакета не загружал транспорт и зависимости
+_lazy = {
+    'MerchantAPI': 'client',
+    'Response': 'client',
+    'MerchantAPIPool': 'pool',
+}
+
+if sys.version_info < (3, 7):
+    from .client import MerchantAPI
+    from .client import Response
+    from .pool import MerchantAPIPool
+else:
+    def __getattr__(name):
+        if name not in _lazy:
+            raise AttributeError('module %r has no attribute %r' % (__name__, name))
+        from importlib import import_module
+        value = getattr(import_module('.' + _lazy[name], __name__), name)
+        globals()[name] = value
+        return value
+
+    def __dir__():
+        return sorted(set(globals()) | set(_lazy))
@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+import threading
+try:
+    from Queue import Queue
+except ImportError:
+    from queue import Queue
+
+
+DEFAULT_WORKERS = 8
+
+
+class BatchItemResult(object):
+    """
+    Результат выполнения одного элемента пакетной операции
+    """
+
+    def __init__(self, key, response=None, error=None):
+        """
+        :param key: Идентификатор элемента (например, идентификатор заказа)
+        :param response: Ответ API
+        :type response: merchantapi_client.client.Response or None
+        :param error: Исключение, возникшее при выполнении
+        :type error: Exception or None
+        """
+        self._key = key
+        self._response = response
+        self._error = error
+
+    def get_key(self):
+        return self._key
+
+    def get_response(self):
+        """
+        :rtype: merchantapi_client.client.Response or None
+        """
+        return self._response
+
+    def get_error(self):
+        """
+        :rtype: Exception or None
+        """
+        return self._error
+
+    def is_success(self):
+        """
+        :rtype: bool
+        """
+        if self._error is not None or self._response is None:
+            return False
+        if self._response.get_error() is not None:
+            return False
+        try:
+            return 200 <= int(self._response.get_http_code()) < 300
+        except (TypeError, ValueError):
+            return False
+
+    def __repr__(self):
+        return '<BatchItemResult %r success=%r>' % (self._key, self.is_success())
+
+
+class BatchResult(object):
+    """
+    Отчет о выполнении пакетной операции
+    """
+
+    def __init__(self, items=None):
+        """
+        :type items: list of BatchItemResult
+        """
+        self._items = items if items is not None else []
+
+    def get_items(self):
+        """
+        :rtype: list of BatchItemResult
+        """
+        return self._items
+
+    def get_succeeded(self):
+        """
+        :rtype: list of BatchItemResult
+        """
+        return [item for item in self._items if item.is_success()]
+
+    def get_failed(self):
+        """
+        :rtype: list of BatchItemResult
+        """
+        return [item for item in self._items if not item.is_success()]
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def __len__(self):
+        return len(self._items)
+
+
+def run_batch(func, tasks, max_workers=DEFAULT_WORKERS, callback=None):
+    """
+    Выполняет func для каждого элемента tasks в пуле потоков.
+    Элементы tasks читаются по мере освобождения потоков, поэтому источник может быть генератором.
+    :param func: Вызываемый объект, возвращающий Response
+    :param tasks: Пары (ключ, кортеж аргументов func)
+    :type tasks: iterable
+    :param max_workers: Количество потоков
+    :type max_workers: int
+    :param callback: Вызывается с BatchItemResult по завершении каждого элемента
+    :rtype: BatchResult
+    """
+    if not isinstance(max_workers, int) or max_workers < 1:
+        raise ValueError('Argument \'%s\' must be positive integer' % max_workers)
+    queue = Queue(max_workers * 2)
+    results = []
+    lock = threading.Lock()
+
+    def worker():
+        while True:
+            task = queue.get()
+            if task is None:
+                return
+            index, key, args = task
+            try:
+                item = BatchItemResult(key, response=func(*args))
+            except Exception as e:
+                item = BatchItemResult(key, error=e)
+            if callback is not None:
+                try:
+                    callback(item)
+                except Exception as e:
+                    item = BatchItemResult(key, item.get_response(), e)
+            with lock:
+                results.append((index, item))
+
+    threads = [threading.Thread(target=worker) for _ in range(max_workers)]
+    for thread in threads:
+        thread.daemon = True
+        thread.start()
+    try:
+        for index, (key, args) in enumerate(tasks):
+            queue.put((index, key, args))
+    finally:
+        for _ in threads:
+            queue.put(None)
+        for thread in threads:
+            thread.join()
+    results.sort(key=lambda pair: pair[0])
+    return BatchResult([item for _, item in results])
@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+import re
+import threading
+import time
+from collections import deque
+from .MerchantAPICircuitOpenException import MerchantAPICircuitOpenException
+
+
+class CircuitBreaker(object):
+    """
+    Автоматический выключатель группы методов API. Считает долю ошибок и медленных ответов
+    в скользящем окне, при превышении порогов отклоняет запросы, а по истечении open_timeout
+    пропускает пробные запросы и по их результату закрывается или снова открывается
+    """
+
+    STATE_CLOSED = 'closed'
+    STATE_OPEN = 'open'
+    STATE_HALF_OPEN = 'half_open'
+
+    def __init__(self, window=60, min_calls=20, error_rate=0.5, slow_call_duration=10, slow_call_rate=0.5,
+                 open_timeout=30, half_open_calls=1, max_concurrent=None):
+        """
+        :param window: Длина скользящего окна в секундах
+        :type window: float
+        :param min_calls: Минимальное количество вызовов в окне для принятия решения
+        :type min_calls: int
+        :param error_rate: Доля ошибок, при которой выключатель открывается
+        :type error_rate: float
+        :param slow_call_duration: Длительность вызова в секундах, начиная с которой он считается медленным
+        :type slow_call_duration: float
+        :param slow_call_rate: Доля медленных вызовов, при которой выключатель открывается
+        :type slow_call_rate: float
+        :param open_timeout: Время в секундах до перехода в полуоткрытое состояние
+        :type open_timeout: float
+        :param half_open_calls: Количество одновременных пробных вызовов в полуоткрытом состоянии
+        :type half_open_calls: int
+        :param max_concurrent: Максимальное количество одновременных вызовов, сверх него запросы отклоняются
+        :type max_concurrent: int or None
+        """
+        self._window = window
+        self._min_calls = min_calls
+        self._error_rate = error_rate
+        self._slow_call_duration = slow_call_duration
+        self._slow_call_rate = slow_call_rate
+        self._open_timeout = open_timeout
+        self._half_open_calls = half_open_calls
+        self._max_concurrent = max_concurrent
+        self._state = self.STATE_CLOSED
+        self._opened_at = None
+        self._probes = 0
+        self._generation = 0
+        self._in_flight = 0
+        self._calls = deque()
+        self._lock = threading.Lock()
+
+    def get_state(self):
+        """
+        :rtype: str
+        """
+        with self._lock:
+            if self._state == self.STATE_OPEN and time.time() - self._opened_at >= self._open_timeout:
+                return self.STATE_HALF_OPEN
+            return self._state
+
+    def check(self, group):
+        """
+        Быстрая проверка без учета вызова, например до ожидания в очередях запросов
+        :param group: Группа методов API, используется в исключении
+        :type group: str
+        :raise: MerchantAPICircuitOpenException
+        """
+        with self._lock:
+            if self._state == self.STATE_OPEN and time.time() - self._opened_at < self._open_timeout:
+                raise MerchantAPICircuitOpenException(group)
+
+    def before_call(self, group):
+        """
+        Проверяет, можно ли выполнить вызов
+        :param group: Группа методов API, используется в исключении
+        :type group: str
+        :return: Признак вызова, передаваемый в after_call: поколение состояния и признак пробного вызова
+        :rtype: tuple
+        :raise: MerchantAPICircuitOpenException
+        """
+        with self._lock:
+            if self._max_concurrent is not None and self._in_flight >= self._max_concurrent:
+                raise MerchantAPICircuitOpenException(group, 'Too many concurrent calls for \'%s\'' % group)
+            if self._state == self.STATE_OPEN:
+                if time.time() - self._opened_at < self._open_timeout:
+                    raise MerchantAPICircuitOpenException(group)
+                self._set_state(self.STATE_HALF_OPEN)
+                self._probes = 0
+            probe = self._state == self.STATE_HALF_OPEN
+            if probe:
+                if self._probes >= self._half_open_calls:
+                    raise MerchantAPICircuitOpenException(group)
+                self._probes += 1
+            self._in_flight += 1
+            return self._generation, probe
+
+    def after_call(self, token, success, duration):
+        """
+        Учитывает результат вызова, разрешенного before_call. Результаты вызовов, начатых
+        до смены состояния, не меняют текущее состояние
+        :param token: Значение, возвращенное before_call
+        :type token: tuple
+        :type success: bool
+        :param duration: Длительность вызова в секундах
+        :type duration: float
+        """
+        generation, probe = token
+        now = time.time()
+        slow = duration >= self._slow_call_duration
+        with self._lock:
+            self._in_flight -= 1
+            if generation != self._generation:
+                return
+            if probe:
+                self._probes -= 1
+                if success and not slow:
+                    self._set_state(self.STATE_CLOSED)
+                    self._calls.clear()
+                else:
+                    self._open(now)
+                return
+            self._calls.append((now, not success, slow))
+            while self._calls and self._calls[0][0] < now - self._window:
+                self._calls.popleft()
+            total = len(self._calls)
+            if self._state == self.STATE_CLOSED and total >= self._min_calls:
+                errors = sum(1 for _, failed, _ in self._calls if failed)
+                slow_calls = sum(1 for _, _, is_slow in self._calls if is_slow)
+                if errors >= total * self._error_rate or slow_calls >= total * self._slow_call_rate:
+                    self._open(now)
+
+    def _open(self, now):
+        self._set_state(self.STATE_OPEN)
+        self._opened_at = now
+        self._calls.clear()
+
+    def _set_state(self, state):
+        self._state = state
+        self._generation += 1
+
+
+class CircuitBreakerRegistry(object):
+    """
+    Набор выключателей по группам методов API. Группа определяется путем запроса без числовых
+    идентификаторов и параметров, например 'orders/packages' для /api/1.0/orders/123/packages
+    """
+
+    _id_segment = re.compile(r'^\d+$')
+
+    def __init__(self, api_path='/api/1.0/', **breaker_options):
+        """
+        :param api_path: Префикс пути API, отбрасываемый при определении группы
+        :type api_path: str
+        :param breaker_options: Параметры создаваемых CircuitBreaker
+        """
+        self._api_path = api_path
+        self._options = breaker_options
+        self._breakers = {}
+        self._lock = threading.Lock()
+
+    def get_group(self, uri):
+        """
+        :type uri: str
+        :rtype: str
+        """
+        path = uri.split('?', 1)[0]
+        if path.startswith(self._api_path):
+            path = path[len(self._api_path):]
+        return '/'.join(segment for segment in path.split('/') if segment and not self._id_segment.match(segment))
+
+    def get(self, group):
+        """
+        :type group: str
+        :rtype: CircuitBreaker
+        """
+        with self._lock:
+            breaker = self._breakers.get(group)
+            if breaker is None:
+                breaker = self._breakers[group] = CircuitBreaker(**self._options)
+            return breaker
+
+    def get_states(self):
+        """
+        :return: Состояния выключателей по группам
+        :rtype: dict
+        """
+        with self._lock:
+            breakers = dict(self._breakers)
+        return dict((group, breaker.get_state()) for group, breaker in breakers.items())
@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+import hashlib
+import io
+import json
+import os
+import threading
+from .batch import run_batch, DEFAULT_WORKERS
+
+
+ACTION_CREATE = 'create'
+ACTION_UPDATE = 'update'
+ACTION_DELETE = 'delete'
+
+
+def get_bundle_hash(bundle):
+    """
+    Возвращает хеш канонического представления бандла
+    :type bundle: merchantapi_client.Entities.PostBundle.PostBundle
+    :rtype: str
+    """
+    canonical = json.dumps(bundle.get_attributes(), sort_keys=True, separators=(',', ':'))
+    return hashlib.md5(canonical.encode('utf-8')).hexdigest()
+
+
+class BundleIndex(object):
+    """
+    Локальный индекс хешей последних отправленных версий бандлов, хранится в JSON файле
+    """
+
+    def __init__(self, path):
+        """
+        :type path: str
+        """
+        self._path = path
+        self._lock = threading.Lock()
+        self._hashes = {}
+        if os.path.exists(path):
+            with io.open(path, encoding='utf-8') as f:
+                self._hashes = dict((int(key), value) for key, value in json.load(f).items())
+
+    def get_hashes(self):
+        """
+        :return: Хеши по идентификаторам бандлов
+        :rtype: dict
+        """
+        return dict(self._hashes)
+
+    def set(self, bundle_id, bundle_hash):
+        with self._lock:
+            self._hashes[bundle_id] = bundle_hash
+
+    def delete(self, bundle_id):
+        with self._lock:
+            self._hashes.pop(bundle_id, None)
+
+    def save(self):
+        """
+        Записывает индекс во временный файл и атомарно заменяет им исходный
+        """
+        with self._lock:
+            data = json.dumps(dict((str(key), value) for key, value in self._hashes.items()), sort_keys=True)
+            tmp_path = self._path + '.tmp'
+            with open(tmp_path, 'w') as f:
+                f.write(data)
+            getattr(os, 'replace', os.rename)(tmp_path, self._path)
+
+
+class BundleReconciler(object):
+    """
+    Приводит каталог бандлов к желаемому состоянию, отправляя только создание новых,
+    изменение отличающихся и удаление отсутствующих бандлов. Индекс сохраняется после каждого созданного
+    бандла, чтобы после сбоя повторный запуск не создавал его снова, и после каждых save_interval изменений
+    и удалений
+    """
+
+    def __init__(self, api, index_path, max_workers=DEFAULT_WORKERS, save_interval=100):
+        """
+        :type api: merchantapi_client.client.MerchantAPI
+        :param index_path: Путь к файлу индекса отправленных бандлов
+        :type index_path: str
+        :param max_workers: Количество одновременных запросов
+        :type max_workers: int
+        :param save_interval: Количество подтвержденных изменений и удалений между сохранениями индекса
+        :type save_interval: int
+        """
+        self._api = api
+        self._index = BundleIndex(index_path)
+        self._max_workers = max_workers
+        self._save_interval = save_interval
+
+    def get_index(self):
+        """
+        :rtype: BundleIndex
+        """
+        return self._index
+
+    def plan(self, bundles, delete_missing=True):
+        """
+        Вычисляет необходимые изменения
+        :param bundles: Желаемые бандлы по идентификаторам
+        :type bundles: dict
+        :param delete_missing: Удалять бандлы, которые есть в индексе, но отсутствуют в bundles
+        :type delete_missing: bool
+        :return: Кортежи (действие, идентификатор бандла, бандл или None, хеш или None)
+        :rtype: list of tuple
+        """
+        pushed = self._index.get_hashes()
+        actions = []
+        for bundle_id, bundle in bundles.items():
+            if not isinstance(bundle_id, int):
+                raise ValueError('Argument \'%s\' must be integer' % bundle_id)
+            bundle_hash = get_bundle_hash(bundle)
+            if bundle_id not in pushed:
+                actions.append((ACTION_CREATE, bundle_id, bundle, bundle_hash))
+            elif pushed[bundle_id] != bundle_hash:
+                actions.append((ACTION_UPDATE, bundle_id, bundle, bundle_hash))
+        if delete_missing:
+            for bundle_id in pushed:
+                if bundle_id not in bundles:
+                    actions.append((ACTION_DELETE, bundle_id, None, None))
+        return actions
+
+    def _apply(self, action, bundle_id, bundle):
+        if action == ACTION_CREATE:
+            return self._api.method_bundle_create(bundle_id, bundle)
+        if action == ACTION_UPDATE:
+            return self._api.method_bundle_update(bundle_id, bundle)
+        return self._api.method_bundle_delete(bundle_id)
+
+    def reconcile(self, bundles, delete_missing=True):
+        """
+        Выполняет изменения параллельно и сохраняет в индекс успешно примененные
+        :type bundles: dict
+        :type delete_missing: bool
+        :return: Отчет, ключ элемента - кортеж (действие, идентификатор бандла)
+        :rtype: merchantapi_client.batch.BatchResult
+        """
+        hashes = {}
+        tasks = []
+        for action, bundle_id, bundle, bundle_hash in self.plan(bundles, delete_missing):
+            hashes[bundle_id] = bundle_hash
+            tasks.append(((action, bundle_id), (action, bundle_id, bundle)))
+
+        unsaved = [0]
+        lock = threading.Lock()
+
+        def confirm(item):
+            if not item.is_success():
+                return
+            action, bundle_id = item.get_key()
+            if action == ACTION_DELETE:
+                self._index.delete(bundle_id)
+            else:
+                self._index.set(bundle_id, hashes[bundle_id])
+            with lock:
+                unsaved[0] += 1
+                if action != ACTION_CREATE and unsaved[0] < self._save_interval:
+                    return
+                unsaved[0] = 0
+            self._index.save()
+
+        try:
+            return run_batch(self._apply, tasks, self._max_workers, confirm)
+        finally:
+            self._index.save()
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache(object):
+    """
+    Потокобезопасный кеш с ограничением времени жизни записей и вытеснением давно не используемых
+    """
+
+    def __init__(self, ttl=None, max_size=None):
+        """
+        :param ttl: Время жизни записи в секундах, None - без ограничения
+        :type ttl: float or None
+        :param max_size: Максимальное количество записей, None - без ограничения
+        :type max_size: int or None
+        """
+        if max_size is not None and (not isinstance(max_size, int) or max_size < 1):
+            raise ValueError('Argument \'%s\' must be positive integer' % max_size)
+        self._ttl = ttl
+        self._max_size = max_size
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            expires, value = entry
+            if expires is not None and expires <= time.time():
+                del self._data[key]
+                return default
+            # перемещаем запись в конец, как последнюю использованную
+            del self._data[key]
+            self._data[key] = entry
+            return value
+
+    def set(self, key, value):
+        expires = None if self._ttl is None else time.time() + self._ttl
+        with self._lock:
+            if key in self._data:
+                del self._data[key]
+            self._data[key] = (expires, value)
+            if self._max_size is not None:
+                while len(self._data) > self._max_size:
+                    self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __contains__(self, key):
+        return self.get(key, self) is not self
+
+    def __len__(self):
+        return len(self._data)
@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+import base64
+import gzip
+import hashlib
+import io
+import json
+import threading
+import time
+from collections import deque
+
+
+def _open(path, mode):
+    if path.endswith('.gz'):
+        return io.TextIOWrapper(gzip.open(path, mode + 'b'), encoding='utf-8')
+    return io.open(path, mode, encoding='utf-8')
+
+
+def _body_md5(body):
+    if body is None:
+        body = b''
+    if not isinstance(body, bytes):
+        body = body.encode('utf-8')
+    return hashlib.md5(body).hexdigest()
+
+
+class RecordingTransport(object):
+    """
+    Транспорт, записывающий запросы и ответы другого транспорта в кассету: файл JSONL
+    (сжатый gzip, если имя оканчивается на .gz). Для каждого запроса сохраняются метод, URI,
+    MD5 тела, код, заголовки и тело ответа, время ответа и момент отправки от начала записи
+    """
+
+    def __init__(self, transport, path):
+        """
+        :param transport: Транспорт, выполняющий запросы
+        :type transport: merchantapi_client.transport.HTTPTransport
+        :param path: Путь к файлу кассеты
+        :type path: str
+        """
+        self._transport = transport
+        self._file = _open(path, 'w')
+        self._lock = threading.Lock()
+        self._started = time.time()
+
+    def request(self, method, uri, body, headers):
+        """
+        :rtype: tuple
+        """
+        sent = time.time()
+        status, response_headers, data = self._transport.request(method, uri, body, headers)
+        elapsed = time.time() - sent
+        record = {
+            'method': method,
+            'uri': uri,
+            'bodyMD5': _body_md5(body),
+            'status': status,
+            'headers': response_headers,
+            'at': round(sent - self._started, 6),
+            'elapsed': round(elapsed, 6)
+        }
+        try:
+            record['body'] = data.decode('utf-8')
+        except UnicodeDecodeError:
+            record['bodyBase64'] = base64.b64encode(data).decode('ascii')
+        line = json.dumps(record, ensure_ascii=False, separators=(',', ':'))
+        with self._lock:
+            self._file.write(u'%s\n' % line)
+        return status, response_headers, data
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+        self._transport.close()
+
+
+class ReplayTransport(object):
+    """
+    Транспорт, отвечающий на запросы из кассеты без обращения к сети. Ответы на одинаковые запросы
+    (метод, URI, MD5 тела) выдаются в порядке записи, после исчерпания повторяется последний
+    """
+
+    def __init__(self, path, speed=1.0):
+        """
+        :param path: Путь к файлу кассеты
+        :type path: str
+        :param speed: Множитель скорости: задержка ответа равна записанному времени ответа, деленному на speed.
+                      0 - отвечать без задержки
+        :type speed: float
+        """
+        if speed < 0:
+            raise ValueError('Argument \'%s\' must not be negative' % speed)
+        self._speed = speed
+        self._records = {}
+        self._lock = threading.Lock()
+        with _open(path, 'r') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                key = (record['method'], record['uri'], record['bodyMD5'])
+                self._records.setdefault(key, deque()).append(record)
+
+    def get_records_count(self):
+        """
+        :rtype: int
+        """
+        return sum(len(records) for records in self._records.values())
+
+    def request(self, method, uri, body, headers):
+        """
+        :rtype: tuple
+        :raise: KeyError
+        """
+        key = (method, uri, _body_md5(body))
+        with self._lock:
+            records = self._records.get(key)
+            if not records:
+                raise KeyError('No recorded response for %s %s' % (method, uri))
+            record = records.popleft() if len(records) > 1 else records[0]
+        if self._speed:
+            time.sleep(record['elapsed'] / self._speed)
+        if 'bodyBase64' in record:
+            data = base64.b64decode(record['bodyBase64'])
+        else:
+            data = record['body'].encode('utf-8')
+        return record['status'], record['headers'], data
+
+    def close(self):
+        pass
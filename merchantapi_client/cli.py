@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+"""
+Консольный инструмент для пакетных операций Merchant API.
+
+Запуск: python -m merchantapi_client --app-id ID <команда> [параметры]
+Секретный ключ передается параметром --app-secret или переменной окружения MERCHANTAPI_APP_SECRET.
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+from .client import MerchantAPI
+from .compat import PY2, open_csv
+from .batch import run_batch
+from .export import OrderExporter, FORMAT_JSONL, FORMAT_CSV
+from .feed import iter_feed_offers
+from .progress import Progress
+from .serialization import _chunks
+from .ratelimit import RateLimiter
+from .transport import HTTPTransport
+
+
+DIRECTORIES = [
+    ('order_statuses', 'method_get_directory_order_statuses'),
+    ('delivery_variants', 'method_get_directory_delivery_variants'),
+    ('delivery_statuses', 'method_get_directory_delivery_statuses'),
+    ('payment_types', 'method_get_directory_payment_types'),
+    ('appeal_subject', 'method_get_directory_appeal_subject'),
+    ('appeal_status', 'method_get_directory_appeal_status'),
+]
+
+
+def _parse_date(value):
+    from dateutil.parser import parse
+    return parse(value)
+
+
+def _open_output(path):
+    if path == '-':
+        # в Python 2 sys.stdout принимает только байтовые строки
+        return io.open(sys.stdout.fileno(), 'w', encoding='utf-8', closefd=False) if PY2 else sys.stdout
+    return io.open(path, 'w', encoding='utf-8')
+
+
+def _read_csv(path):
+    with open_csv(path) as f:
+        for row in csv.DictReader(f):
+            yield row
+
+
+def export_orders(api, args, progress):
+    filters = {}
+    if args.date_from:
+        filters['transition_date_from'] = _parse_date(args.date_from)
+    if args.date_to:
+        filters['transition_date_to'] = _parse_date(args.date_to)
+    if args.status:
+        filters['status'] = args.status
+    exporter = OrderExporter(api, args.output, args.format, args.state, args.page_size, args.details,
+                             args.concurrency, **filters)
+    exporter.run(progress)
+    return 0
+
+
+def push_offers(api, args, progress):
+    # ключ элемента отчета - номер части, сами части не хранятся после отправки
+    sizes = {}
+
+    def tasks():
+        for index, chunk in enumerate(_chunks(iter_feed_offers(args.feed, args.yml_id), args.chunk_size)):
+            sizes[index] = len(chunk)
+            yield index, (chunk,)
+
+    def report(item):
+        count = sizes[item.get_key()]
+        if item.is_success():
+            del sizes[item.get_key()]
+        progress.add(count if item.is_success() else 0, 0 if item.is_success() else count)
+
+    result = run_batch(api.method_set_offers, tasks(), args.concurrency, report)
+    for item in result.get_failed():
+        response = item.get_response()
+        sys.stderr.write('chunk %d of %d offers failed: %s\n' % (
+            item.get_key(), sizes[item.get_key()],
+            item.get_error() or (response.get_http_code(), response.get_error())))
+    return 1 if result.get_failed() else 0
+
+
+def set_statuses(api, args, progress):
+    statuses = [(int(row['order_id']), row['status'], int(row['reason_id']), row.get('comment') or '')
+                for row in _read_csv(args.file)]
+
+    def report(item):
+        progress.add(1 if item.is_success() else 0, 0 if item.is_success() else 1)
+
+    result = api.method_set_order_statuses(statuses, args.concurrency, report)
+    for item in result:
+        if not item.is_success():
+            response = item.get_response()
+            sys.stderr.write('order %s failed: %s\n' % (
+                item.get_key(), item.get_error() or (response.get_http_code(), response.get_error())))
+    return 1 if result.get_failed() else 0
+
+
+def dump_directories(api, args, progress):
+    directories = {}
+    result = run_batch(lambda method: getattr(api, method)(), ((name, (method,)) for name, method in DIRECTORIES),
+                       args.concurrency)
+    for item in result:
+        directories[item.get_key()] = item.get_response().get_data() if item.is_success() else None
+        progress.add(1 if item.is_success() else 0, 0 if item.is_success() else 1)
+    output = _open_output(args.output)
+    try:
+        output.write(u'%s\n' % json.dumps(directories, ensure_ascii=False, indent=2))
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    return 1 if result.get_failed() else 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='merchantapi', description='Wikimart Merchant API bulk tool')
+    parser.add_argument('--host', default='merchant.wikimart.ru')
+    parser.add_argument('--app-id', required=True)
+    parser.add_argument('--app-secret', default=os.environ.get('MERCHANTAPI_APP_SECRET'),
+                        help='defaults to MERCHANTAPI_APP_SECRET environment variable')
+    parser.add_argument('--concurrency', type=int, default=4, help='parallel requests')
+    parser.add_argument('--rate', type=float, help='maximum requests per second')
+    parser.add_argument('--quiet', action='store_true', help='do not report progress')
+    commands = parser.add_subparsers(dest='command')
+    commands.required = True
+
+    command = commands.add_parser('export-orders', help='export orders to JSONL or CSV, resumable')
+    command.add_argument('--from', dest='date_from', help='transition date from')
+    command.add_argument('--to', dest='date_to', help='transition date to')
+    command.add_argument('--status', choices=MerchantAPI._valid_statuses)
+    command.add_argument('--page-size', type=int, default=100)
+    command.add_argument('--details', action='store_true', help='fetch every order with method_get_order')
+    command.add_argument('--format', choices=[FORMAT_JSONL, FORMAT_CSV], default=FORMAT_JSONL)
+    command.add_argument('--state', help='resume state file, defaults to <output>.state')
+    command.add_argument('--output', required=True)
+    command.set_defaults(func=export_orders, label='orders')
+
+    command = commands.add_parser('push-offers', help='update stock and prices from CSV feed '
+                                                      '(yml_id,own_id[,time,available,stock,price]) or YML feed')
+    command.add_argument('feed')
+    command.add_argument('--yml-id', type=int, help='YML file id, required for YML feeds')
+    command.add_argument('--chunk-size', type=int, default=500)
+    command.set_defaults(func=push_offers, label='offers')
+
+    command = commands.add_parser('set-statuses', help='change order statuses from CSV '
+                                                       '(order_id,status,reason_id[,comment])')
+    command.add_argument('file')
+    command.set_defaults(func=set_statuses, label='orders')
+
+    command = commands.add_parser('dump-directories', help='dump all directories as JSON')
+    command.add_argument('--output', default='-')
+    command.set_defaults(func=dump_directories, label='directories')
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if not args.app_secret:
+        parser.error('--app-secret or MERCHANTAPI_APP_SECRET is required')
+    if args.command == 'push-offers' and args.yml_id is None and args.feed.lower().endswith(('.xml', '.yml')):
+        parser.error('--yml-id is required for YML feeds')
+    api = MerchantAPI(args.host, args.app_id, args.app_secret,
+                      transport=HTTPTransport(args.host, max(args.concurrency, 1)),
+                      rate_limiter=RateLimiter(args.rate) if args.rate else None)
+    progress = Progress(args.label, interval=0 if args.quiet else 1.0)
+    code = args.func(api, args, progress)
+    if not args.quiet:
+        progress.finish()
+    return code
@@ -1,23 +1,23 @@
 # -*- coding: utf-8 -*-
-import hmac
-import hashlib
-from email import utils
-from datetime import datetime
 import time
-import json
-from xml.etree import ElementTree
-from dateutil.tz import tzlocal
-try:
-    from httplib import HTTPConnection
-except ImportError:
-    from http.client import HTTPConnection
-try:
-    from urllib import urlencode
-except ImportError:
-    from urllib.parse import urlencode
+from datetime import datetime
+from .lazy import LazyModule
 from .MerchantAPIException import MerchantAPIException
-from .Entities.PostPackage import PostPackage
-from .Entities.PostBundle import PostBundle
+from .MerchantAPIClockSkewException import MerchantAPIClockSkewException
+from .clock import ClockSkewEstimator
+from .batch import run_batch, DEFAULT_WORKERS
+from .serialization import get_body_md5, get_offers_body, get_bundle_body
+
+# Зависимости, нужные только части методов, загружаются при первом использовании
+copy = LazyModule('copy')
+hashlib = LazyModule('hashlib')
+hmac = LazyModule('hmac')
+json = LazyModule('json')
+utils = LazyModule('email.utils')
+ElementTree = LazyModule('xml.etree.ElementTree')
+tz = LazyModule('dateutil.tz')
+urllib = LazyModule('urllib.parse', 'urllib')
+post_package = LazyModule('merchantapi_client.Entities.PostPackage')
 
 
 def get_DATE_W3C_format(date_time):
@@ -84,12 +84,30 @@ class MerchantAPI:
 
     VERSION = '1.0'
 
-    def __init__(self, host, app_id, app_secret, data_type=DATA_JSON):
+    def __init__(self, host, app_id, app_secret, data_type=DATA_JSON, transport=None, rate_limiter=None,
+                 single_flight=None, circuit_breakers=None, concurrency_limiter=None, scheduler=None,
+                 hedging=None, clock=None):
         """
         :param host: Хост Wikimart merchant API
         :param app_id: Идентификатор доступа
         :param app_secret: Секретный ключ
         :param data_type: Тип данных
+        :param transport: Транспорт с пулом соединений. По умолчанию создается HTTPTransport для host
+        :type transport: HTTPTransport or None
+        :param rate_limiter: Ограничитель частоты запросов, может быть общим для нескольких клиентов
+        :type rate_limiter: merchantapi_client.ratelimit.RateLimiter or None
+        :param single_flight: Объединение одновременных одинаковых GET запросов в один
+        :type single_flight: merchantapi_client.singleflight.SingleFlight or None
+        :param circuit_breakers: Выключатели по группам методов API
+        :type circuit_breakers: merchantapi_client.breaker.CircuitBreakerRegistry or None
+        :param concurrency_limiter: Адаптивный ограничитель одновременных запросов
+        :type concurrency_limiter: merchantapi_client.limiter.AdaptiveConcurrencyLimiter or None
+        :param scheduler: Планировщик запросов по классам приоритета
+        :type scheduler: merchantapi_client.scheduler.PriorityScheduler or None
+        :param hedging: Политика дублирования медленных GET запросов
+        :type hedging: merchantapi_client.hedging.HedgingPolicy or None
+        :param clock: Оценка расхождения часов с сервером для даты подписи. По умолчанию создается ClockSkewEstimator
+        :type clock: merchantapi_client.clock.ClockSkewEstimator or None
         :raise: ValueError
         """
         self._host = host
@@ -98,6 +116,20 @@ class MerchantAPI:
         if data_type not in self._valid_data_format:
             raise ValueError('Valid values for data type is: ' + (','.join(self._valid_data_format)))
         self._data_type = data_type
+        if transport is None:
+            from .transport import HTTPTransport
+            transport = HTTPTransport(host)
+        self._transport = transport
+        self._rate_limiter = rate_limiter
+        self._single_flight = single_flight
+        self._circuit_breakers = circuit_breakers
+        self._concurrency_limiter = concurrency_limiter
+        self._scheduler = scheduler
+        self._hedging = hedging
+        if clock is None:
+            clock = ClockSkewEstimator()
+        self._clock = clock
+        self._priority = None
 
     def get_host(self):
         """
@@ -124,11 +156,43 @@ class MerchantAPI:
         """
         return self._data_type
 
-    def _api(self, uri, method, body=None):
+    def with_priority(self, priority):
+        """
+        Возвращает клиента, запросы которого выполняются планировщиком с указанным приоритетом.
+        Клиент использует те же транспорт, ограничители и планировщик
+        :param priority: Класс приоритета планировщика
+        :type priority: str
+        :rtype: MerchantAPI
+        """
+        client = copy.copy(self)
+        client._priority = priority
+        return client
+
+    def get_priority(self):
+        """
+        :rtype: str or None
+        """
+        return self._priority
+
+    def get_transport(self):
+        """
+        :rtype: HTTPTransport
+        """
+        return self._transport
+
+    def get_clock(self):
+        """
+        :rtype: merchantapi_client.clock.ClockSkewEstimator
+        """
+        return self._clock
+
+    def _api(self, uri, method, body=None, body_md5=None):
         """
         :param uri:
         :param method:  Метод HTTP запроса. Может принимать значения: 'GET', 'POST', 'PUT', 'DELETE'.
-        :param body:
+        :param body: Тело запроса, для XML в Python 3 - bytes
+        :type body: str or bytes or None
+        :param body_md5: Заранее вычисленный MD5 тела запроса
         :rtype: Response
         :raises: MerchantAPIException
         :raise: ValueError
@@ -144,36 +208,126 @@ class MerchantAPI:
         if method not in valid_method:
             raise ValueError('Valid values for argument \'method\' is: %s' % ", ".join(valid_method))
 
-        if body is not None and not isinstance(body, str):
-            raise ValueError('Argument \'body\' must be string')
+        # тела в XML сериализуются ElementTree.tostring и в Python 3 являются bytes
+        if body is not None and not isinstance(body, (str, bytes)):
+            raise ValueError('Argument \'body\' must be string or bytes')
 
-        date = datetime.now()
-        dtuple = date.timetuple()
-        dtimestamp = time.mktime(dtuple)
+        if method == self.METHOD_GET and self._single_flight is not None:
+            return self._single_flight.do((self._access_id, uri), lambda: self._read(uri))
+        if method == self.METHOD_GET:
+            return self._read(uri)
+        return self._call(uri, method, body, body_md5)
+
+    def _read(self, uri):
+        """
+        Выполняет GET запрос, дублируя его по политике hedging, если она задана
+        :rtype: Response
+        :raises: MerchantAPIException
+        """
+        if self._hedging is None:
+            return self._call(uri, self.METHOD_GET)
+        return self._hedging.execute(lambda: self._call(uri, self.METHOD_GET))
+
+    def _call(self, uri, method, body=None, body_md5=None):
+        """
+        Выполняет запрос, если выключатель группы методов не открыт. Запрос к открытой группе
+        отклоняется до ожидания в планировщике и ограничителях
+        :rtype: Response
+        :raises: MerchantAPIException, MerchantAPICircuitOpenException
+        """
+        if self._circuit_breakers is not None:
+            group = self._circuit_breakers.get_group(uri)
+            self._circuit_breakers.get(group).check(group)
+        return self._send(uri, method, body, body_md5)
+
+    def _send(self, uri, method, body=None, body_md5=None):
+        """
+        Подписывает и выполняет запрос
+        :rtype: Response
+        :raises: MerchantAPIException
+        """
+        if self._scheduler is None:
+            return self._send_limited(uri, method, body, body_md5)
+        priority = self._scheduler.acquire(self._priority)
+        try:
+            return self._send_limited(uri, method, body, body_md5)
+        finally:
+            self._scheduler.release(priority)
+
+    def _send_limited(self, uri, method, body=None, body_md5=None):
+        """
+        :rtype: Response
+        :raises: MerchantAPIException
+        """
+        if self._rate_limiter is not None:
+            self._rate_limiter.acquire()
+        if self._concurrency_limiter is None:
+            return self._send_guarded(uri, method, body, body_md5)
+        started = self._concurrency_limiter.acquire()
+        success = False
+        try:
+            response = self._send_guarded(uri, method, body, body_md5)
+            code = response.get_http_code()
+            success = code != 429 and code < 500
+            return response
+        finally:
+            self._concurrency_limiter.release(started, success)
+
+    def _send_guarded(self, uri, method, body=None, body_md5=None):
+        """
+        Выполняет запрос через выключатель группы методов. Длительность и количество одновременных
+        вызовов учитываются только для запросов, уже прошедших очереди
+        :rtype: Response
+        :raises: MerchantAPIException, MerchantAPICircuitOpenException
+        """
+        if self._circuit_breakers is None:
+            return self._sign_and_send(uri, method, body, body_md5)
+        group = self._circuit_breakers.get_group(uri)
+        breaker = self._circuit_breakers.get(group)
+        token = breaker.before_call(group)
+        started = time.time()
+        success = False
+        try:
+            response = self._sign_and_send(uri, method, body, body_md5)
+            code = response.get_http_code()
+            success = code != 429 and code < 500
+            return response
+        finally:
+            breaker.after_call(token, success, time.time() - started)
+
+    def _sign_and_send(self, uri, method, body=None, body_md5=None):
+        """
+        :rtype: Response
+        :raises: MerchantAPIException, MerchantAPIClockSkewException
+        """
+        dtimestamp = self._clock.now()
 
-        connect = HTTPConnection(self._host)
         header = {
             'User-agent': 'Mozilla/5.0 (compatible; Wikimart-MerchantAPIClient/' + self.VERSION + "/python",
             'Accept': 'application/' + self.get_data_type(),
             'X-WM-Date': utils.formatdate(dtimestamp),
             'X-WM-Authentication': "%s:%s" % (self._access_id, self._generate_signature(uri, method, body, dtimestamp,
-                                                                                        self._secret_key))
+                                                                                        self._secret_key, body_md5))
         }
         if method == self.METHOD_GET or method == self.METHOD_DELETE:
-            try:
-                connect.request(method, uri, headers=header)
-                resp = connect.getresponse()
-            except Exception:
-                raise MerchantAPIException('Can`t get response')
-        elif method == self.METHOD_PUT or method == self.METHOD_POST:
-            try:
-                data = body
-                connect.request(method, uri, data, header)
-                resp = connect.getresponse()
-            except Exception:
-                raise MerchantAPIException('Can`t get response')
-
-        data = resp.read()
+            body = None
+        hedging = self._hedging if method == self.METHOD_GET else None
+        if hedging is not None:
+            hedging.mark_sent()
+        started = time.time()
+        try:
+            status, headers, data = self._transport.request(method, uri, body, header)
+        except Exception:
+            raise MerchantAPIException('Can`t get response')
+        finished = time.time()
+        if hedging is not None:
+            hedging.record(finished - started)
+        offset = self._clock.observe(headers.get('date'), started, finished)
+        if status in (401, 403) and offset is not None:
+            skew = offset - (dtimestamp - started)
+            if abs(skew) > self._clock.get_max_skew():
+                self._clock.reset(offset)
+                raise MerchantAPIClockSkewException(skew)
 
         try:
             decoded = json.loads(data)
@@ -181,33 +335,37 @@ class MerchantAPI:
             decoded = data
 
         error = None
-        if resp.status != '200':
+        if status != 200:
             if isinstance(decoded, dict) and ('message' in decoded):
                 error = decoded['message']
-        response = Response(decoded, resp.status, error)
+        response = Response(decoded, status, error)
         return response
 
+    _get_body_md5 = staticmethod(get_body_md5)
+
     @staticmethod
-    def _generate_signature(uri, method, body, date, secret_key):
+    def _generate_signature(uri, method, body, date, secret_key, body_md5=None):
         """
         :type uri: str
         :type method: str
         :type body: str
         :type date: datetime
+        :param body_md5: Заранее вычисленный MD5 тела запроса
+        :type body_md5: str or None
         :rtype: str
         """
         if not isinstance(date, float):
             dtuple = date.timetuple()
             date = time.mktime(dtuple)
-        md5_body = hashlib.new("md5")
-        if body is None:
-            body = ""
-        md5_body.update(body.encode())
+        if body_md5 is None:
+            body_md5 = MerchantAPI._get_body_md5(body)
         str_to_hash = method + "\n" \
-                      + str(md5_body.hexdigest()) + "\n" \
+                      + body_md5 + "\n" \
                       + "%s" % utils.formatdate(date) + "\n" \
                       + uri
 
+        if not isinstance(secret_key, bytes):
+            secret_key = secret_key.encode()
         return hmac.new(secret_key, str_to_hash.encode(), hashlib.sha1).hexdigest()
 
     def method_get_order(self, order_id):
@@ -267,13 +425,13 @@ class MerchantAPI:
         if transition_date_to is not None:
             dtuple = transition_date_to.timetuple()
             dtimestamp = time.mktime(dtuple)
-            params['transitionDateFrom'] = utils.formatdate(dtimestamp)
+            params['transitionDateTo'] = utils.formatdate(dtimestamp)
         if transition_status is not None:
             if transition_status not in self._valid_statuses:
                 raise ValueError(('Valid values for argument \'%s\' is: ' % transition_status) + ', '.join(self._valid_statuses))
             else:
                 params['transitionStatus'] = transition_status
-        return self._api(self.API_PATH + "orders?" + urlencode(params), self.METHOD_GET)
+        return self._api(self.API_PATH + "orders?" + urllib.urlencode(params), self.METHOD_GET)
 
     def method_get_order_status_reasons(self, order_id):
         """
@@ -301,14 +459,7 @@ class MerchantAPI:
         :rtype: Response
         :raise: ValueError
         """
-        if not isinstance(order_id, int):
-            raise ValueError('Argument \'%s\' must be integer' % order_id)
-        if status not in self._valid_statuses:
-            raise ValueError(('Valid values for argument \'%s\' is: ' % status) + ', '.join(self._valid_statuses))
-        if not isinstance(reason_id, int):
-            raise ValueError('Argument \'%s\' must be integer' % reason_id)
-        if not isinstance(comment, str):
-            raise ValueError('Argument \'%s\' must be string' % comment)
+        self._validate_order_status(order_id, status, reason_id, comment)
         if self.get_data_type() == self.DATA_JSON:
             put_body = json.dumps({
                 'status': status,
@@ -318,14 +469,53 @@ class MerchantAPI:
         elif self.get_data_type() == self.DATA_XML:
             xml = ElementTree.Element('request')
             ElementTree.SubElement(xml, 'status').text = status
-            ElementTree.SubElement(xml, 'reasonID').text=reason_id
-            ElementTree.SubElement(xml, 'comment').text=comment
+            ElementTree.SubElement(xml, 'reasonID').text = str(reason_id)
+            ElementTree.SubElement(xml, 'comment').text = comment
             put_body = ElementTree.tostring(xml, 'utf-8')
         else:
             raise ValueError("Unknown data type")
         return self._api(self.API_PATH + "orders/{orderID}/status".format(orderID=order_id), self.METHOD_PUT,
                          put_body)
 
+    def _validate_order_status(self, order_id, status, reason_id, comment):
+        """
+        :raise: ValueError
+        """
+        if not isinstance(order_id, int):
+            raise ValueError('Argument \'%s\' must be integer' % order_id)
+        if status not in self._valid_statuses:
+            raise ValueError(('Valid values for argument \'%s\' is: ' % status) + ', '.join(self._valid_statuses))
+        if not isinstance(reason_id, int):
+            raise ValueError('Argument \'%s\' must be integer' % reason_id)
+        if not isinstance(comment, str):
+            raise ValueError('Argument \'%s\' must be string' % comment)
+
+    def method_set_order_statuses(self, statuses, max_workers=DEFAULT_WORKERS, callback=None):
+        """
+        Пакетная смена статусов заказов. Все элементы проверяются до отправки первого запроса,
+        запросы выполняются параллельно по соединениям из пула транспорта. Каждый заказ может встречаться
+        в списке только один раз, так как порядок параллельных запросов не определен
+        :param statuses: Кортежи (order_id, status, reason_id, comment)
+        :type statuses: list of tuple
+        :param max_workers: Количество одновременных запросов
+        :type max_workers: int
+        :param callback: Функция, вызываемая с BatchItemResult по мере завершения запросов
+        :type callback: callable or None
+        :return: Отчет с результатом по каждому заказу, ключ элемента - идентификатор заказа
+        :rtype: merchantapi_client.batch.BatchResult
+        :raise: ValueError
+        """
+        statuses = list(statuses)
+        order_ids = set()
+        for item in statuses:
+            if not isinstance(item, tuple) or len(item) != 4:
+                raise ValueError('Elements of \'%s\' must be tuples (order_id, status, reason_id, comment)' % item)
+            self._validate_order_status(*item)
+            if item[0] in order_ids:
+                raise ValueError('Order \'%s\' occurs more than once' % item[0])
+            order_ids.add(item[0])
+        return run_batch(self.method_set_order_status, ((item[0], item) for item in statuses), max_workers, callback)
+
     def method_get_order_status_history(self, order_id):
         """
         Получение истории смены статусов заказа
@@ -348,10 +538,7 @@ class MerchantAPI:
         :rtype: Response
         :raise: ValueError
         """
-        if not isinstance(order_id, int):
-            raise ValueError('Argument \'%s\' must be integer' % order_id)
-        if not isinstance(comment, str):
-            raise ValueError('Argument \'%s\' must be str' % comment)
+        self._validate_order_comment(order_id, comment)
 
         if self.get_data_type() == self.DATA_JSON:
             post_body = json.dumps(
@@ -368,6 +555,16 @@ class MerchantAPI:
         return self._api(self.API_PATH + "orders/{orderID}/comments".format(orderID=order_id),
                          self.METHOD_POST, post_body)
 
+    @staticmethod
+    def _validate_order_comment(order_id, comment):
+        """
+        :raise: ValueError
+        """
+        if not isinstance(order_id, int):
+            raise ValueError('Argument \'%s\' must be integer' % order_id)
+        if not isinstance(comment, str):
+            raise ValueError('Argument \'%s\' must be str' % comment)
+
     def method_order_get_comments(self, order_id):
         """
         Получение комментариев заказа
@@ -389,8 +586,27 @@ class MerchantAPI:
         :rtype: Response
         :raise: ValueError
         """
+        self._validate_post_package(order_id, package)
+        post_body, body_md5 = package.get_serialized(self.get_data_type(), self._serialize_post_package)
+        return self._api(self.API_PATH + "orders/{orderID}/packages".format(orderID=order_id),
+                         self.METHOD_POST, post_body, body_md5)
+
+    @staticmethod
+    def _validate_post_package(order_id, package):
+        """
+        :raise: ValueError
+        """
         if not isinstance(order_id, int):
             raise ValueError('Argument \'%s\' must be integer' % order_id)
+        if not isinstance(package, post_package.PostPackage):
+            raise ValueError('Argument \'%s\' must be PostPackage' % package)
+
+    def _serialize_post_package(self, package):
+        """
+        :type package: PostPackage
+        :return: Тело запроса и его MD5
+        :rtype: tuple
+        """
         if self.get_data_type() == self.DATA_JSON:
             post_body = json.dumps(package.get_attributes())
         elif self.get_data_type() == self.DATA_XML:
@@ -405,8 +621,33 @@ class MerchantAPI:
             post_body = ElementTree.tostring(top, 'utf-8')
         else:
             raise ValueError("Unknown data type")
-        return self._api(self.API_PATH + "orders/{orderID}/packages".format(orderID=order_id),
-                         self.METHOD_POST, post_body)
+        return post_body, self._get_body_md5(post_body)
+
+    def method_register_post_packages(self, packages, progress_log=None, max_workers=DEFAULT_WORKERS):
+        """
+        Пакетная регистрация отправлений. Источник читается по мере отправки запросов,
+        поэтому может быть генератором (например, read_post_packages_csv)
+        :param packages: Пары (order_id, PostPackage)
+        :type packages: iterable of tuple
+        :param progress_log: Журнал подтвержденных регистраций. Отправления из журнала пропускаются,
+                             успешно зарегистрированные добавляются в него
+        :type progress_log: merchantapi_client.packages.PackageProgressLog or None
+        :param max_workers: Количество одновременных запросов
+        :type max_workers: int
+        :return: Отчет, ключ элемента - кортеж (order_id, package_id)
+        :rtype: merchantapi_client.batch.BatchResult
+        """
+        def tasks():
+            for order_id, package in packages:
+                if progress_log is not None and progress_log.is_done(order_id, package.package_id):
+                    continue
+                yield (order_id, package.package_id), (order_id, package)
+
+        def confirm(item):
+            if progress_log is not None and item.is_success():
+                progress_log.mark_done(*item.get_key())
+
+        return run_batch(self.method_register_post_package, tasks(), max_workers, confirm)
 
     def method_set_order_delivery_state(self, order_id, state, date_time):
         """
@@ -420,16 +661,23 @@ class MerchantAPI:
         :rtype: Response
         :raise: ValueError
         """
-        if not isinstance(order_id, int):
-            raise ValueError('Argument \'%s\' must be integer' % order_id)
-        if not isinstance(state, str) or len(state) > 50:
-            raise ValueError('Argument \'%s\' must be string. Max length is 50 characters' % state)
+        self._validate_delivery_state(order_id, state)
         if not isinstance(date_time, datetime):
-            date_time = datetime.now(tz=tzlocal())
+            date_time = datetime.now(tz=tz.tzlocal())
         put_body = self._get_body_for_state_update(state, date_time)
         return self._api(self.API_PATH + "orders/{orderID}/deliverystatus".format(orderID=order_id),
                          self.METHOD_PUT, put_body)
 
+    @staticmethod
+    def _validate_delivery_state(order_id, state):
+        """
+        :raise: ValueError
+        """
+        if not isinstance(order_id, int):
+            raise ValueError('Argument \'%s\' must be integer' % order_id)
+        if not isinstance(state, str) or len(state) > 50:
+            raise ValueError('Argument \'%s\' must be string. Max length is 50 characters' % state)
+
     def _get_body_for_state_update(self, state, date_time):
         """
         :type state: string
@@ -475,20 +723,27 @@ class MerchantAPI:
         :rtype: Response
         :raise: ValueError
         """
-        if not isinstance(order_id, int):
-            raise ValueError('Argument \'%s\' must be integer' % order_id)
-        if not isinstance(package_id, int):
-            raise ValueError('Argument \'%s\' must be integer' % package_id)
-        if not isinstance(state, str):
-            raise ValueError('Argument \'%s\' must be integer' % state)
+        self._validate_package_state(order_id, package_id, state)
         if not isinstance(date_time, datetime):
-            date_time = datetime.now(tz=tzlocal())
+            date_time = datetime.now(tz=tz.tzlocal())
         put_body = self._get_body_for_state_update(state, date_time)
         return self._api(self.API_PATH +
                          "orders/{orderID}/packages/{packageID}/states".format(
                              orderID=order_id, packageID=package_id),
                          self.METHOD_PUT, put_body)
 
+    @staticmethod
+    def _validate_package_state(order_id, package_id, state):
+        """
+        :raise: ValueError
+        """
+        if not isinstance(order_id, int):
+            raise ValueError('Argument \'%s\' must be integer' % order_id)
+        if not isinstance(package_id, int):
+            raise ValueError('Argument \'%s\' must be integer' % package_id)
+        if not isinstance(state, str):
+            raise ValueError('Argument \'%s\' must be string' % state)
+
     def method_get_subject_appeal(self, order_id):
         """
         Получение списка возможных причин претензий
@@ -513,13 +768,7 @@ class MerchantAPI:
         :rtype: Response
         :raises: ValueError
         """
-
-        if not isinstance(order_id, int):
-            raise ValueError('Argument \'%s\' must be integer' % order_id)
-        if not isinstance(subject_id, int):
-            raise ValueError('Argument \'%s\' must be integer' % subject_id)
-        if not isinstance(comment, str):
-            raise ValueError('Argument \'%s\' must be str' % comment)
+        self._validate_appeal(order_id, subject_id, comment)
 
         if self.get_data_type() == self.DATA_JSON:
             post_body = json.dumps({
@@ -536,6 +785,18 @@ class MerchantAPI:
         return self._api(self.API_PATH +
                          "orders/{orderID}/appeals".format(orderID=order_id), self.METHOD_POST, post_body)
 
+    @staticmethod
+    def _validate_appeal(order_id, subject_id, comment):
+        """
+        :raise: ValueError
+        """
+        if not isinstance(order_id, int):
+            raise ValueError('Argument \'%s\' must be integer' % order_id)
+        if not isinstance(subject_id, int):
+            raise ValueError('Argument \'%s\' must be integer' % subject_id)
+        if not isinstance(comment, str):
+            raise ValueError('Argument \'%s\' must be str' % comment)
+
     def method_set_offers(self, offers):
         """
         Обновление товаров
@@ -550,31 +811,17 @@ class MerchantAPI:
         :rtype: Response
         :raise: ValueError
         """
-        if not isinstance(offers, dict):
-            raise ValueError('Argument \'%s\' must be dict' % offers)
-        if self.get_data_type() == self.DATA_JSON:
-            put_body = json.dumps({
-                "offers": offers
-            })
-        elif self.get_data_type() == self.DATA_XML:
-            xml = ElementTree.Element('request')
-            offers_xml = ElementTree.SubElement(xml, 'offers')
-            for offer in offers:
-                offer_xml = ElementTree.SubElement(offers_xml, 'item')
-                ElementTree.SubElement(offer_xml, 'yml_id').text = str(offer['yml_id'])
-                ElementTree.SubElement(offer_xml, 'own_id').text = str(offer['own_id'])
-                if 'time' in offer:
-                    ElementTree.SubElement(offer_xml, 'time').text = offer['time']
-                if 'available' in offer:
-                    ElementTree.SubElement(offer_xml, 'available').text = str(int(offer['available']))
-                if 'stock' in offer:
-                    ElementTree.SubElement(offer_xml, 'stock').text = str(offer['stock'])
-                if 'price' in offer:
-                    ElementTree.SubElement(offer_xml, 'price').text = str(offer['price'])
-            put_body = ElementTree.tostring(xml, 'utf-8')
-        else:
-            raise ValueError("Unknown data type")
-        return self._api(self.API_PATH + "offers", self.METHOD_PUT, put_body)
+        if not isinstance(offers, list):
+            raise ValueError('Argument \'%s\' must be list' % offers)
+        put_body = get_offers_body(self.get_data_type(), offers)
+        return self._put_offers(put_body)
+
+    def _put_offers(self, put_body, body_md5=None):
+        """
+        Отправляет готовое тело запроса обновления товаров
+        :rtype: Response
+        """
+        return self._api(self.API_PATH + "offers", self.METHOD_PUT, put_body, body_md5)
 
     def method_post_offers(self, yml_id, own_id, city=None):
         """
@@ -583,13 +830,15 @@ class MerchantAPI:
         :param own_id: Собственные идентификаторы товаров магазина
         :type own_id: list
         :param city: Город для получения информации по ценам.
-        :return:
+        :type city: int or None
+        :rtype: Response
+        :raise: ValueError
         """
         if not isinstance(yml_id, int):
             raise ValueError("Argument \'%s\' must be int" % yml_id)
         if not isinstance(own_id, list):
             raise ValueError("Argument \'%s\' must be list" % own_id)
-        if city is not None or not isinstance(city, int):
+        if city is not None and not isinstance(city, int):
             raise ValueError("Argument \'%s\' must be int" % city)
 
         if self.get_data_type() == self.DATA_JSON:
@@ -610,57 +859,31 @@ class MerchantAPI:
             xml = ElementTree.Element('request')
             own_ids = ElementTree.SubElement(xml, 'own_id')
             for o_id in own_id:
-                ElementTree.SubElement(own_ids, 'item').text = o_id
+                ElementTree.SubElement(own_ids, 'item').text = str(o_id)
             if city is not None:
-                ElementTree.SubElement(xml, 'city').text = city
+                ElementTree.SubElement(xml, 'city').text = str(city)
             post_body = ElementTree.tostring(xml, 'utf-8')
         else:
             raise ValueError("Unknown data type")
 
-        return self._api(self.API_PATH + "/api/1.0/offers/{ymlId}".format(orderID=yml_id), self.METHOD_PUT,
+        return self._api(self.API_PATH + "offers/{ymlId}".format(ymlId=yml_id), self.METHOD_PUT,
                          post_body)
 
     def _get_body_for_bundle_modification(self, bundle):
         """
+        Возвращает тело запроса и его MD5. Результат кешируется в бандле до его изменения
         :type bundle: PostBundle
-        :rtype: str
+        :rtype: tuple
         """
-        if self.get_data_type() == self.DATA_JSON:
-            body = json.dumps(bundle.get_attributes())
-        elif self.get_data_type() == self.DATA_XML:
-            xml = ElementTree.Element('request')
-            ElementTree.SubElement(xml, 'name').text = bundle.name
-            ElementTree.SubElement(xml, 'description').text = bundle.description
-            if bundle.start_time is not None:
-                ElementTree.SubElement(xml, 'startTime').text = bundle.start_time
-            if bundle.end_time is not None:
-                ElementTree.SubElement(xml, 'endTime').text = bundle.end_time
-            if bundle.is_available is not None:
-                ElementTree.SubElement(xml, 'isAvailable').text = str(int(bundle.is_available))
-            slots = ElementTree.SubElement(xml, 'slots')
-            for slot in bundle.slots:
-                slots_item = ElementTree.SubElement(slots, 'item')
-                ElementTree.SubElement(slots_item, 'isAnchor').text = str(int(slot.is_anchor))
-
-                offers = ElementTree.SubElement(slots_item, 'offers')
-                for offer in slot.offers:
-                    offers_item = ElementTree.SubElement(offers, 'item')
-                    ElementTree.SubElement(offers_item, 'ownId').text = str(offer.own_id)
-                    if offer.yml_id is not None:
-                        ElementTree.SubElement(offers_item, 'ymlId').text = str(offer.yml_id)
-
-                if slot.bonus_type is not None and slot.bonus_amount is not None:
-                    bonus = ElementTree.SubElement(slots_item, 'type')
-                    ElementTree.SubElement(bonus, 'type').text = slot.bonus_type
-                    ElementTree.SubElement(bonus, 'value').text = str(slot.bonus_amount)
-            if bundle.bonus_type is not None and bundle.bonus_amount is not None:
-                bonus = ElementTree.SubElement(xml, 'bonus')
-                ElementTree.SubElement(bonus, 'type').text = bundle.bonus_type
-                ElementTree.SubElement(bonus, 'value').text = str(bundle.bonus_amount)
-            body = ElementTree.tostring(xml, 'utf-8')
-        else:
-            raise ValueError('Unknown data type')
-        return body
+        return bundle.get_serialized(self.get_data_type(), self._serialize_bundle)
+
+    def _serialize_bundle(self, bundle):
+        """
+        :type bundle: PostBundle
+        :rtype: tuple
+        """
+        body = get_bundle_body(self.get_data_type(), bundle)
+        return body, self._get_body_md5(body)
 
     def method_bundle_create(self, bundle_id, bundle):
         """
@@ -673,10 +896,10 @@ class MerchantAPI:
         """
         if not isinstance(bundle_id, int):
             raise ValueError('Argument \'%s\' must be integer' % bundle_id)
-        post_body = self._get_body_for_bundle_modification(bundle)
+        post_body, body_md5 = self._get_body_for_bundle_modification(bundle)
 
         return self._api(self.API_PATH + "bundles/{bundleID}".format(bundleID=bundle_id),
-                         self.METHOD_POST, post_body)
+                         self.METHOD_POST, post_body, body_md5)
 
     def method_bundle_update(self, bundle_id, bundle):
         """
@@ -689,10 +912,10 @@ class MerchantAPI:
         """
         if not isinstance(bundle_id, int):
             raise ValueError('Argument \'%s\' must be integer' % bundle_id)
-        put_body = self._get_body_for_bundle_modification(bundle)
+        put_body, body_md5 = self._get_body_for_bundle_modification(bundle)
 
         return self._api(self.API_PATH + "bundles/{bundleID}".format(bundleID=bundle_id),
-                         self.METHOD_PUT, put_body)
+                         self.METHOD_PUT, put_body, body_md5)
 
     def method_bundle_delete(self, bundle_id):
         """
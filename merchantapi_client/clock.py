@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+from .lazy import LazyModule
+
+utils = LazyModule('email.utils')
+
+
+class ClockSkewEstimator(object):
+    """
+    Оценка расхождения локальных часов с часами сервера по заголовку Date ответов. Каждый ответ дает
+    измерение относительно середины интервала запроса, измерения сглаживаются экспоненциально.
+    Скачок больше step секунд (например, после синхронизации локальных часов) принимается сразу
+    """
+
+    def __init__(self, smoothing=0.1, step=5.0, max_rtt=2.0, max_skew=60.0):
+        """
+        :param smoothing: Вес нового измерения
+        :type smoothing: float
+        :param step: Отклонение измерения от оценки в секундах, при котором оценка заменяется измерением
+        :type step: float
+        :param max_rtt: Максимальное время запроса в секундах, при котором ответ используется для оценки
+        :type max_rtt: float
+        :param max_skew: Расхождение в секундах, при котором отказ в аутентификации считается вызванным часами
+        :type max_skew: float
+        """
+        if not 0 < smoothing <= 1:
+            raise ValueError('Argument \'%s\' must be between 0 and 1' % smoothing)
+        self._smoothing = smoothing
+        self._step = step
+        self._max_rtt = max_rtt
+        self._max_skew = max_skew
+        self._offset = 0.0
+        self._samples = 0
+        self._lock = threading.Lock()
+
+    def now(self):
+        """
+        Возвращает время сервера с учетом расхождения часов
+        :rtype: float
+        """
+        return time.time() + self._offset
+
+    def get_offset(self):
+        """
+        Возвращает оценку расхождения часов сервера с локальными в секундах
+        :rtype: float
+        """
+        return self._offset
+
+    def get_max_skew(self):
+        """
+        :rtype: float
+        """
+        return self._max_skew
+
+    def observe(self, date, started, finished):
+        """
+        Учитывает заголовок Date ответа на запрос, отправленный в started и полученный в finished
+        :param date: Значение заголовка Date
+        :type date: str or None
+        :type started: float
+        :type finished: float
+        :return: Измеренное расхождение или None, если заголовок не разобран
+        :rtype: float or None
+        """
+        server_time = self._parse(date)
+        if server_time is None:
+            return None
+        # Date округлен вниз до секунды, поэтому время сервера в среднем на полсекунды больше
+        sample = server_time + 0.5 - (started + finished) / 2.0
+        if finished - started > self._max_rtt:
+            return sample
+        with self._lock:
+            if self._samples == 0 or abs(sample - self._offset) > self._step:
+                self._offset = sample
+            else:
+                self._offset += self._smoothing * (sample - self._offset)
+            self._samples += 1
+        return sample
+
+    def reset(self, offset):
+        """
+        Заменяет оценку расхождения, например после отказа сервера в аутентификации
+        :type offset: float
+        """
+        with self._lock:
+            self._offset = offset
+            self._samples = 1
+
+    @staticmethod
+    def _parse(date):
+        """
+        :type date: str or None
+        :rtype: float or None
+        """
+        if not date:
+            return None
+        parsed = utils.parsedate_tz(date)
+        if parsed is None:
+            return None
+        return float(utils.mktime_tz(parsed))
@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+"""
+Совместимость файлового ввода-вывода с Python 2. Модуль csv в Python 2 работает только с байтовыми
+строками, поэтому CSV файлы открываются в двоичном режиме, а значения остаются строками str в UTF-8,
+которые принимают проверки аргументов клиента
+"""
+import csv
+import io
+import sys
+
+PY2 = sys.version_info[0] == 2
+
+
+def open_csv(path, mode='r'):
+    """
+    Открывает CSV файл в UTF-8 в режиме, подходящем для модуля csv текущей версии Python
+    :type path: str
+    :type mode: str
+    """
+    if PY2:
+        return io.open(path, mode + 'b')
+    return io.open(path, mode, encoding='utf-8', newline='')
+
+
+def to_native(text):
+    """
+    Преобразует текст в str текущей версии Python: в Python 2 - в байтовую строку UTF-8
+    :type text: str or unicode
+    :rtype: str
+    """
+    if PY2 and isinstance(text, type(u'')):
+        return text.encode('utf-8')
+    return text
+
+
+class DictWriter(csv.DictWriter):
+    """
+    csv.DictWriter, принимающий текстовые значения в обеих версиях Python
+    """
+
+    def __init__(self, f, fieldnames, *args, **kwargs):
+        csv.DictWriter.__init__(self, f, [to_native(name) for name in fieldnames], *args, **kwargs)
+
+    def writeheader(self):
+        self.writerow(dict((name, name) for name in self.fieldnames))
+
+    def writerow(self, row):
+        return csv.DictWriter.writerow(self, dict((to_native(key), to_native(value)) for key, value in row.items()))
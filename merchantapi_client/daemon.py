@@ -0,0 +1,312 @@
+# -*- coding: utf-8 -*-
+"""
+Демон отслеживания заказов. Периодически читает список заказов, измененных с момента предыдущего опроса,
+загружает подробности новых и измененных заказов в пуле потоков и передает события в приемник.
+
+Запуск: python -m merchantapi_client.daemon --host merchant.wikimart.ru --app-id ID --jsonl events.jsonl
+"""
+import argparse
+import hashlib
+import io
+import json
+import logging
+import os
+import signal
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+try:
+    from Queue import Full
+except ImportError:
+    from queue import Full
+from .client import MerchantAPI
+from .MerchantAPIException import MerchantAPIException
+from .batch import run_batch
+from .pagination import iter_orders
+from .Entities.Order import Order
+from .Entities.OrderStatus import OrderStatus
+from .Entities.OrderComment import OrderComment
+
+
+logger = logging.getLogger(__name__)
+
+
+class OrderEvent(object):
+    """
+    Событие появления нового или изменения существующего заказа
+    """
+
+    TYPE_NEW = 'new'
+    TYPE_CHANGED = 'changed'
+
+    def __init__(self, event_type, order, status_history, comments):
+        """
+        :type event_type: str
+        :type order: Order
+        :type status_history: list of OrderStatus
+        :type comments: list of OrderComment
+        """
+        self.type = event_type
+        self.order = order
+        self.status_history = status_history
+        self.comments = comments
+
+    def to_dict(self):
+        """
+        :rtype: dict
+        """
+        return {
+            'type': self.type,
+            'orderID': self.order.id,
+            'order': self.order.get_data(),
+            'statusHistory': [item.get_data() for item in self.status_history],
+            'comments': [item.get_data() for item in self.comments]
+        }
+
+
+class CallableSink(object):
+    """
+    Передает события вызываемому объекту
+    """
+
+    def __init__(self, func):
+        self._func = func
+
+    def send(self, event):
+        """
+        :type event: OrderEvent
+        """
+        self._func(event)
+
+    def close(self):
+        pass
+
+
+class JSONLFileSink(object):
+    """
+    Дописывает события в файл, по одному JSON объекту в строке
+    """
+
+    def __init__(self, path):
+        """
+        :type path: str
+        """
+        self._file = io.open(path, 'a', encoding='utf-8')
+        self._lock = threading.Lock()
+
+    def send(self, event):
+        """
+        :type event: OrderEvent
+        """
+        line = json.dumps(event.to_dict(), ensure_ascii=False)
+        with self._lock:
+            self._file.write(u'%s\n' % line)
+            self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class QueueSink(object):
+    """
+    Помещает события в локальную очередь. Заполненная очередь блокирует обработчики,
+    что замедляет опрос API до освобождения места
+    """
+
+    def __init__(self, queue, timeout=None):
+        """
+        :type queue: Queue
+        :param timeout: Максимальное время ожидания места в очереди, None - без ограничения
+        :type timeout: float or None
+        """
+        self._queue = queue
+        self._timeout = timeout
+
+    def send(self, event):
+        """
+        :type event: OrderEvent
+        :raise: Full
+        """
+        self._queue.put(event, True, self._timeout)
+
+    def close(self):
+        pass
+
+
+class OrderWatcher(object):
+    """
+    Опрашивает method_get_order_list по окнам времени смены статуса и отправляет события по новым
+    и измененным заказам. Состояние (время последнего опроса и отпечатки заказов) сохраняется в файл
+    контрольной точки, поэтому после перезапуска уже доставленные события не повторяются
+    """
+
+    def __init__(self, api, sink, checkpoint_path=None, interval=60, page_size=100, max_workers=4, overlap=300,
+                 max_seen=100000):
+        """
+        :type api: MerchantAPI
+        :param sink: Приемник событий с методами send(event) и close()
+        :param checkpoint_path: Путь к файлу контрольной точки
+        :type checkpoint_path: str or None
+        :param interval: Интервал между опросами в секундах
+        :type interval: float
+        :param page_size: Размер страницы списка заказов
+        :type page_size: int
+        :param max_workers: Количество потоков загрузки подробностей заказов
+        :type max_workers: int
+        :param overlap: Перекрытие окон опроса в секундах, компенсирует задержку появления изменений в списке
+        :type overlap: float
+        :param max_seen: Максимальное количество хранимых отпечатков заказов
+        :type max_seen: int
+        """
+        self._api = api
+        self._sink = sink
+        self._checkpoint_path = checkpoint_path
+        self._interval = interval
+        self._page_size = page_size
+        self._max_workers = max_workers
+        self._overlap = overlap
+        self._max_seen = max_seen
+        self._stop_event = threading.Event()
+        self._lock = threading.Lock()
+        self._last_poll = None
+        self._seen = OrderedDict()
+        self._load_checkpoint()
+
+    def _load_checkpoint(self):
+        if self._checkpoint_path is None or not os.path.exists(self._checkpoint_path):
+            return
+        with io.open(self._checkpoint_path, encoding='utf-8') as f:
+            checkpoint = json.load(f)
+        self._last_poll = checkpoint.get('lastPoll')
+        for order_id, fingerprint in checkpoint.get('seen', []):
+            self._seen[order_id] = fingerprint
+
+    def _save_checkpoint(self):
+        if self._checkpoint_path is None:
+            return
+        with self._lock:
+            data = json.dumps({'lastPoll': self._last_poll, 'seen': list(self._seen.items())})
+        tmp_path = self._checkpoint_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write(data)
+        getattr(os, 'replace', os.rename)(tmp_path, self._checkpoint_path)
+
+    @staticmethod
+    def _fingerprint(order):
+        """
+        :type order: Order
+        :rtype: str
+        """
+        return hashlib.md5(json.dumps(order.get_data(), sort_keys=True).encode('utf-8')).hexdigest()
+
+    def _remember(self, order_id, fingerprint):
+        with self._lock:
+            self._seen.pop(order_id, None)
+            self._seen[order_id] = fingerprint
+            while len(self._seen) > self._max_seen:
+                self._seen.popitem(last=False)
+
+    def _process(self, order_id, event_type, fingerprint):
+        """
+        Загружает подробности заказа и передает событие в приемник
+        :rtype: merchantapi_client.client.Response
+        :raise: MerchantAPIException
+        """
+        response = self._api.method_get_order(order_id)
+        if response.get_error() is not None:
+            raise MerchantAPIException('Can`t get order %s: %s' % (order_id, response.get_error()))
+        history = self._api.method_get_order_status_history(order_id)
+        comments = self._api.method_order_get_comments(order_id)
+        event = OrderEvent(event_type, Order.from_response(response),
+                           OrderStatus.list_from_response(history) if history.get_error() is None else [],
+                           OrderComment.list_from_response(comments) if comments.get_error() is None else [])
+        self._sink.send(event)
+        self._remember(order_id, fingerprint)
+        return response
+
+    def _changed_orders(self, window_from, window_to):
+        filters = {'transition_date_to': window_to}
+        if window_from is not None:
+            filters['transition_date_from'] = window_from
+        for order in iter_orders(self._api, self._page_size, **filters):
+            if self._stop_event.is_set():
+                return
+            fingerprint = self._fingerprint(order)
+            with self._lock:
+                previous = self._seen.get(order.id)
+            if previous == fingerprint:
+                continue
+            event_type = OrderEvent.TYPE_NEW if previous is None else OrderEvent.TYPE_CHANGED
+            yield order.id, (order.id, event_type, fingerprint)
+
+    def poll_once(self):
+        """
+        Выполняет один цикл опроса. Время окна сдвигается только если все события цикла доставлены
+        :rtype: merchantapi_client.batch.BatchResult
+        :raise: MerchantAPIException
+        """
+        started = time.time()
+        window_from = None
+        if self._last_poll is not None:
+            window_from = datetime.fromtimestamp(self._last_poll - self._overlap)
+        result = run_batch(self._process, self._changed_orders(window_from, datetime.fromtimestamp(started)),
+                           self._max_workers)
+        for item in result.get_failed():
+            logger.warning('Order %s was not delivered: %s', item.get_key(), item.get_error())
+        if not result.get_failed() and not self._stop_event.is_set():
+            self._last_poll = started
+        self._save_checkpoint()
+        return result
+
+    def run(self):
+        """
+        Опрашивает API до вызова stop()
+        """
+        while not self._stop_event.is_set():
+            try:
+                self.poll_once()
+            except (MerchantAPIException, Full) as e:
+                logger.error('Poll failed: %s', e)
+            except Exception:
+                logger.exception('Poll failed unexpectedly')
+            self._stop_event.wait(self._interval)
+        self._sink.close()
+
+    def stop(self):
+        """
+        Останавливает опрос. Запросы, которые уже выполняются, завершаются
+        """
+        self._stop_event.set()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Wikimart Merchant API order watcher')
+    parser.add_argument('--host', default='merchant.wikimart.ru')
+    parser.add_argument('--app-id', required=True)
+    parser.add_argument('--app-secret', default=os.environ.get('MERCHANTAPI_APP_SECRET'),
+                        help='defaults to MERCHANTAPI_APP_SECRET environment variable')
+    parser.add_argument('--jsonl', required=True, help='file to append order events to')
+    parser.add_argument('--checkpoint', help='checkpoint file, defaults to <jsonl>.checkpoint')
+    parser.add_argument('--interval', type=float, default=60)
+    parser.add_argument('--page-size', type=int, default=100)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--once', action='store_true', help='poll once and exit')
+    args = parser.parse_args(argv)
+    if not args.app_secret:
+        parser.error('--app-secret or MERCHANTAPI_APP_SECRET is required')
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+
+    api = MerchantAPI(args.host, args.app_id, args.app_secret)
+    watcher = OrderWatcher(api, JSONLFileSink(args.jsonl), args.checkpoint or args.jsonl + '.checkpoint',
+                           args.interval, args.page_size, args.workers)
+    if args.once:
+        watcher.poll_once()
+        return
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: watcher.stop())
+    watcher.run()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+import io
+import json
+import os
+from .MerchantAPIException import MerchantAPIException
+from .compat import open_csv, to_native, DictWriter
+from .batch import run_batch, DEFAULT_WORKERS
+from .pagination import iter_order_pages
+
+
+FORMAT_JSONL = 'jsonl'
+FORMAT_CSV = 'csv'
+
+CSV_FIELDS = ['id', 'status', 'deliveryStatus', 'createdTime', 'updatedTime', 'totalPrice', 'deliveryPrice',
+              'deliveryVariantID', 'paymentTypeID', 'comment', 'customer', 'deliveryAddress', 'items']
+
+
+class OrderExporter(object):
+    """
+    Постранично выгружает заказы в JSONL или CSV файл. В памяти находится только текущая страница.
+    После записи каждой страницы в файл состояния сохраняются номер следующей страницы и размер
+    выходного файла, поэтому прерванная выгрузка продолжается с первой незаписанной страницы,
+    а частично записанная страница отбрасывается. Состояние привязано к параметрам выгрузки: при других
+    фильтрах, формате или размере страницы выгрузка начинается заново. После завершения файл состояния удаляется
+    """
+
+    def __init__(self, api, path, data_format=FORMAT_JSONL, state_path=None, page_size=100, details=False,
+                 max_workers=DEFAULT_WORKERS, csv_fields=None, **filters):
+        """
+        :type api: merchantapi_client.client.MerchantAPI
+        :param path: Путь к выходному файлу
+        :type path: str
+        :param data_format: Формат выгрузки: 'jsonl' или 'csv'
+        :type data_format: str
+        :param state_path: Путь к файлу состояния, по умолчанию <path>.state
+        :type state_path: str or None
+        :param page_size: Размер страницы списка заказов
+        :type page_size: int
+        :param details: Загружать полную информацию о каждом заказе через method_get_order
+        :type details: bool
+        :param max_workers: Количество одновременных запросов при загрузке подробностей
+        :type max_workers: int
+        :param csv_fields: Колонки CSV файла, вложенные значения записываются в JSON
+        :type csv_fields: list of str or None
+        :param filters: Фильтры method_get_order_list
+        :raise: ValueError
+        """
+        if data_format not in (FORMAT_JSONL, FORMAT_CSV):
+            raise ValueError('Valid values for data format is: %s, %s' % (FORMAT_JSONL, FORMAT_CSV))
+        self._api = api
+        self._path = path
+        self._format = data_format
+        self._state_path = state_path or path + '.state'
+        self._page_size = page_size
+        self._details = details
+        self._max_workers = max_workers
+        self._csv_fields = csv_fields or CSV_FIELDS
+        self._filters = filters
+
+    def _get_params(self):
+        """
+        Параметры, от которых зависят номера страниц и содержимое выходного файла
+        :rtype: dict
+        """
+        params = dict((name, str(value)) for name, value in self._filters.items())
+        params.update({'format': self._format, 'page_size': self._page_size, 'details': self._details})
+        return params
+
+    def _load_state(self):
+        new_state = {'page': 1, 'offset': 0, 'count': 0, 'params': self._get_params()}
+        if not os.path.exists(self._state_path):
+            return new_state
+        with io.open(self._state_path, encoding='utf-8') as f:
+            state = json.load(f)
+        if state.get('params') != new_state['params']:
+            return new_state
+        return state
+
+    def _save_state(self, state):
+        tmp_path = self._state_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write(json.dumps(state))
+        getattr(os, 'replace', os.rename)(tmp_path, self._state_path)
+
+    def _enrich(self, orders):
+        """
+        :type orders: list of merchantapi_client.Entities.Order.Order
+        :rtype: list of dict
+        :raise: MerchantAPIException
+        """
+        if not self._details:
+            return [order.get_data() for order in orders]
+        result = run_batch(self._api.method_get_order, ((order.id, (order.id,)) for order in orders),
+                           self._max_workers)
+        records = []
+        for order, item in zip(orders, result):
+            if not item.is_success():
+                raise item.get_error() or MerchantAPIException('Can`t get order %s: %s' % (
+                    order.id, item.get_response().get_error() or item.get_response().get_http_code()))
+            records.append(item.get_response().get_data())
+        return records
+
+    def _csv_row(self, record):
+        row = {}
+        for field in self._csv_fields:
+            value = record.get(field)
+            if isinstance(value, (dict, list)):
+                value = json.dumps(value, ensure_ascii=False)
+            row[field] = value
+        return row
+
+    def run(self, progress=None):
+        """
+        Выполняет или продолжает выгрузку
+        :param progress: Счетчик выгруженных заказов
+        :type progress: merchantapi_client.progress.Progress or None
+        :return: Общее количество выгруженных заказов
+        :rtype: int
+        :raise: MerchantAPIException
+        """
+        state = self._load_state()
+        mode = 'r+' if os.path.exists(self._path) else 'w'
+        with open_csv(self._path, mode) as output:
+            output.seek(state['offset'])
+            output.truncate()
+            writer = None
+            if self._format == FORMAT_CSV:
+                writer = DictWriter(output, self._csv_fields, extrasaction='ignore')
+                if state['offset'] == 0:
+                    writer.writeheader()
+            for page, orders in iter_order_pages(self._api, self._page_size, state['page'], **self._filters):
+                records = self._enrich(orders)
+                for record in records:
+                    if writer is not None:
+                        writer.writerow(self._csv_row(record))
+                    else:
+                        output.write(to_native(u'%s\n' % json.dumps(record, ensure_ascii=False)))
+                output.flush()
+                os.fsync(output.fileno())
+                state = {'page': page + 1, 'offset': output.tell(), 'count': state['count'] + len(records),
+                         'params': state['params']}
+                self._save_state(state)
+                if progress is not None:
+                    progress.add(len(records))
+        if os.path.exists(self._state_path):
+            os.remove(self._state_path)
+        return state['count']
@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+import csv
+import mmap
+import os
+from contextlib import closing
+from .batch import DEFAULT_WORKERS
+from .compat import PY2
+from .serialization import upload_offers
+
+_BOM = b'\xef\xbb\xbf' if PY2 else u'\ufeff'
+
+
+def offer_from_row(row, yml_id=None):
+    """
+    Преобразует строку фида в товар в формате method_set_offers
+    :param row: Значения колонок yml_id, own_id, time, available, stock, price
+    :type row: dict
+    :param yml_id: Идентификатор YML-файла для строк без колонки yml_id
+    :type yml_id: int or None
+    :rtype: dict
+    """
+    offer = {'yml_id': int(row.get('yml_id') or yml_id), 'own_id': row['own_id']}
+    if row.get('time'):
+        offer['time'] = row['time']
+    if row.get('available'):
+        offer['available'] = row['available'].lower() in ('1', 'true', 'yes')
+    if row.get('stock'):
+        offer['stock'] = int(row['stock'])
+    if row.get('price'):
+        offer['price'] = float(row['price'])
+    return offer
+
+
+def _iter_lines(mapped):
+    """
+    Возвращает строки отображенного в память файла. В Python 3 каждая строка декодируется непосредственно
+    из отображения, без промежуточной копии в bytes. В Python 2 строки возвращаются байтовыми,
+    как того требует модуль csv
+    :type mapped: mmap.mmap
+    :rtype: generator of str
+    """
+    view = None if PY2 else memoryview(mapped)
+    try:
+        position = 0
+        size = len(mapped)
+        while position < size:
+            end = mapped.find(b'\n', position)
+            if end == -1:
+                end = size
+            if view is None:
+                line = mapped[position:end].rstrip(b'\r')
+            else:
+                line = str(view[position:end], 'utf-8').rstrip('\r')
+            position = end + 1
+            if line:
+                yield line
+    finally:
+        if view is not None:
+            view.release()
+
+
+def _map(f):
+    """
+    Отображает файл в память только для чтения, для пустого файла возвращает None
+    :rtype: mmap.mmap or None
+    """
+    if not os.fstat(f.fileno()).st_size:
+        return None
+    return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def iter_csv_offers(path, yml_id=None, delimiter=','):
+    """
+    Читает товары из CSV фида с заголовком (own_id и, если не указан yml_id, yml_id; необязательные колонки
+    time, available, stock, price). Файл отображается в память и разбирается построчно, поэтому
+    потребление памяти не зависит от его размера. Значения с переводами строк внутри кавычек не поддерживаются
+    :type path: str
+    :param yml_id: Идентификатор YML-файла для всех товаров фида
+    :type yml_id: int or None
+    :rtype: generator of dict
+    :raise: ValueError
+    """
+    with open(path, 'rb') as f:
+        mapped = _map(f)
+        if mapped is None:
+            return
+        with closing(mapped):
+            lines = _iter_lines(mapped)
+            try:
+                header = next(csv.reader([next(lines)], delimiter=delimiter))
+            except StopIteration:
+                lines.close()
+                return
+            header[0] = header[0].lstrip(_BOM)
+            if 'own_id' not in header or ('yml_id' not in header and yml_id is None):
+                raise ValueError('CSV feed \'%s\' must have own_id and yml_id columns' % path)
+            try:
+                for values in csv.reader(lines, delimiter=delimiter):
+                    yield offer_from_row(dict(zip(header, values)), yml_id)
+            finally:
+                lines.close()
+
+
+def iter_yml_offers(path, yml_id):
+    """
+    Читает товары из YML фида (элементы offer с атрибутами id и available, вложенными price и stock).
+    Разобранные элементы сразу удаляются из дерева, поэтому потребление памяти не зависит от размера фида
+    :type path: str
+    :param yml_id: Идентификатор YML-файла
+    :type yml_id: int
+    :rtype: generator of dict
+    """
+    from xml.etree import ElementTree
+    with open(path, 'rb') as f:
+        mapped = _map(f)
+        if mapped is None:
+            return
+        with closing(mapped):
+            # открытые элементы от корня до текущего, обработанный offer удаляется из родителя
+            parents = []
+            for event, element in ElementTree.iterparse(mapped, events=('start', 'end')):
+                if event == 'start':
+                    parents.append(element)
+                    continue
+                parents.pop()
+                if element.tag != 'offer':
+                    continue
+                row = {
+                    'own_id': element.get('id'),
+                    'available': element.get('available'),
+                    'price': element.findtext('price'),
+                    'stock': element.findtext('stock')
+                }
+                if parents:
+                    parents[-1].remove(element)
+                element.clear()
+                yield offer_from_row(row, yml_id)
+
+
+def iter_feed_offers(path, yml_id=None):
+    """
+    Читает товары из фида, формат определяется по расширению файла (.xml или .yml - YML, иначе CSV)
+    :type path: str
+    :type yml_id: int or None
+    :rtype: generator of dict
+    """
+    if path.lower().endswith(('.xml', '.yml')):
+        return iter_yml_offers(path, yml_id)
+    return iter_csv_offers(path, yml_id)
+
+
+def push_feed(api, path, yml_id=None, chunk_size=1000, max_workers=DEFAULT_WORKERS, serializer=None):
+    """
+    Отправляет товары фида через method_set_offers частями по chunk_size, читая фид по мере отправки
+    :type api: merchantapi_client.client.MerchantAPI
+    :type path: str
+    :type yml_id: int or None
+    :type chunk_size: int
+    :type max_workers: int
+    :type serializer: merchantapi_client.serialization.ParallelSerializer or None
+    :rtype: merchantapi_client.batch.BatchResult
+    """
+    return upload_offers(api, iter_feed_offers(path, yml_id), serializer, chunk_size, max_workers)
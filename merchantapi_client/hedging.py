@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+from collections import deque
+try:
+    from Queue import Queue, Empty
+except ImportError:
+    from queue import Queue, Empty
+
+
+class _Workers(object):
+    """
+    Ограниченный набор потоков для попыток запроса. Потоки создаются по мере необходимости и переиспользуются
+    """
+
+    def __init__(self, size):
+        self._size = size
+        self._threads = 0
+        self._idle = 0
+        self._tasks = Queue()
+        self._lock = threading.Lock()
+
+    def try_submit(self, func):
+        """
+        Передает func свободному потоку
+        :return: False, если все потоки заняты
+        :rtype: bool
+        """
+        with self._lock:
+            if self._idle:
+                self._idle -= 1
+            elif self._threads < self._size:
+                self._threads += 1
+                thread = threading.Thread(target=self._run)
+                thread.daemon = True
+                thread.start()
+            else:
+                return False
+        self._tasks.put(func)
+        return True
+
+    def _run(self):
+        while True:
+            func = self._tasks.get()
+            try:
+                func()
+            finally:
+                with self._lock:
+                    self._idle += 1
+
+
+class HedgingPolicy(object):
+    """
+    Дублирование медленных идемпотентных запросов. Если ответ не получен за время, равное заданному
+    перцентилю недавних времен ответа, отправляется повторный запрос и используется первый полученный ответ.
+    Время ответа и задержка отсчитываются от отправки запроса в сеть, ожидание в планировщике
+    и ограничителях клиента не учитывается. Доля повторных запросов ограничена max_extra_ratio,
+    попытки выполняются не более чем в max_threads потоках, при их нехватке запрос не дублируется
+    """
+
+    def __init__(self, percentile=0.95, window=200, min_samples=20, min_delay=0.005, max_extra_ratio=0.1,
+                 max_threads=16):
+        """
+        :param percentile: Перцентиль времени ответа, после которого отправляется повторный запрос
+        :type percentile: float
+        :param window: Количество последних времен ответа для расчета перцентиля
+        :type window: int
+        :param min_samples: Минимальное количество измерений, до накопления которых запросы не дублируются
+        :type min_samples: int
+        :param min_delay: Минимальная задержка перед повторным запросом в секундах
+        :type min_delay: float
+        :param max_extra_ratio: Максимальная доля повторных запросов от общего количества
+        :type max_extra_ratio: float
+        :param max_threads: Максимальное количество потоков для попыток
+        :type max_threads: int
+        """
+        if not 0 < percentile < 1:
+            raise ValueError('Argument \'%s\' must be between 0 and 1' % percentile)
+        if not isinstance(max_threads, int) or max_threads < 1:
+            raise ValueError('Argument \'%s\' must be positive integer' % max_threads)
+        self._percentile = percentile
+        self._samples = deque(maxlen=window)
+        self._min_samples = min_samples
+        self._min_delay = min_delay
+        self._max_extra_ratio = max_extra_ratio
+        self._budget = 0.0
+        self._hedged = 0
+        self._workers = _Workers(max_threads)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def get_hedged_count(self):
+        """
+        :return: Количество отправленных повторных запросов
+        :rtype: int
+        """
+        return self._hedged
+
+    def get_delay(self):
+        """
+        :return: Задержка перед повторным запросом или None, если измерений недостаточно
+        :rtype: float or None
+        """
+        with self._lock:
+            if len(self._samples) < self._min_samples:
+                return None
+            samples = sorted(self._samples)
+        index = min(len(samples) - 1, int(len(samples) * self._percentile))
+        return max(self._min_delay, samples[index])
+
+    def mark_sent(self):
+        """
+        Вызывается клиентом непосредственно перед отправкой запроса в сеть. Для первой попытки
+        с этого момента отсчитывается задержка перед повторным запросом
+        """
+        sent = getattr(self._local, 'sent', None)
+        if sent is not None:
+            self._local.sent = None
+            sent()
+
+    def record(self, latency):
+        """
+        Вызывается клиентом после получения ответа
+        :param latency: Время от отправки запроса в сеть до получения ответа в секундах
+        :type latency: float
+        """
+        with self._lock:
+            self._samples.append(latency)
+
+    def _take_budget(self):
+        with self._lock:
+            if self._budget >= 1:
+                self._budget -= 1
+                self._hedged += 1
+                return True
+            return False
+
+    def _return_budget(self):
+        with self._lock:
+            self._budget += 1
+            self._hedged -= 1
+
+    def execute(self, func):
+        """
+        Выполняет func, при необходимости дублируя вызов
+        :param func: Вызываемый объект без аргументов
+        :return: Результат первого успешно завершившегося вызова
+        """
+        with self._lock:
+            self._budget = min(self._budget + self._max_extra_ratio, 10.0)
+        delay = self.get_delay()
+        if delay is None:
+            return func()
+        results = Queue()
+
+        def attempt(primary):
+            self._local.sent = (lambda: results.put((None, None))) if primary else None
+            try:
+                results.put((True, func()))
+            except Exception as e:
+                results.put((False, e))
+            finally:
+                self._local.sent = None
+
+        if not self._workers.try_submit(lambda: attempt(True)):
+            return func()
+        attempts = 1
+        deadline = None
+        error = None
+        while True:
+            timeout = None if deadline is None else max(0, deadline - time.time())
+            try:
+                success, value = results.get(True, timeout)
+            except Empty:
+                deadline = None
+                if self._take_budget():
+                    if self._workers.try_submit(lambda: attempt(False)):
+                        attempts += 1
+                    else:
+                        self._return_budget()
+                continue
+            if success is None:
+                # первая попытка прошла очереди клиента и отправлена в сеть
+                deadline = time.time() + delay
+                continue
+            if success:
+                return value
+            error = error or value
+            attempts -= 1
+            if not attempts:
+                raise error
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+import threading
+from .MerchantAPIException import MerchantAPIException
+from .cache import TTLCache
+from .Entities.OrderComment import OrderComment
+from .Entities.OrderStatus import OrderStatus
+
+KIND_COMMENTS = 'comments'
+KIND_STATUSES = 'statuses'
+
+
+def _comment_key(comment):
+    """
+    :type comment: OrderComment
+    """
+    if comment.id is not None:
+        return comment.id
+    data = comment.get_data()
+    return data.get('createdTime'), data.get('text')
+
+
+def _status_key(status):
+    """
+    :type status: OrderStatus
+    """
+    data = status.get_data()
+    return data.get('status'), data.get('date'), data.get('reasonID')
+
+
+class OrderHistoryTracker(object):
+    """
+    Инкрементальное получение комментариев и истории статусов заказов. Для каждого заказа запоминаются
+    ключи уже полученных записей, и вызовы возвращают только новые записи. Количество отслеживаемых заказов
+    ограничено max_orders, давно не запрашивавшиеся заказы вытесняются и при следующем запросе
+    возвращают всю историю
+    """
+
+    def __init__(self, api, max_orders=10000, ttl=None):
+        """
+        :type api: merchantapi_client.client.MerchantAPI
+        :param max_orders: Максимальное количество отслеживаемых историй, комментарии и статусы заказа учитываются отдельно
+        :type max_orders: int
+        :param ttl: Время в секундах, после которого заказ перестает отслеживаться, None - без ограничения
+        :type ttl: float or None
+        """
+        self._api = api
+        self._seen = TTLCache(ttl, max_orders)
+        self._lock = threading.Lock()
+
+    def get_new_comments(self, order_id):
+        """
+        Возвращает комментарии заказа, добавленные после предыдущего вызова
+        :type order_id: int
+        :rtype: list of OrderComment
+        :raise: ValueError, MerchantAPIException
+        """
+        response = self._api.method_order_get_comments(order_id)
+        self._check(response, 'comments', order_id)
+        return self._diff((KIND_COMMENTS, order_id), OrderComment.list_from_response(response), _comment_key)
+
+    def get_new_statuses(self, order_id):
+        """
+        Возвращает записи истории статусов заказа, добавленные после предыдущего вызова
+        :type order_id: int
+        :rtype: list of OrderStatus
+        :raise: ValueError, MerchantAPIException
+        """
+        response = self._api.method_get_order_status_history(order_id)
+        self._check(response, 'status history', order_id)
+        return self._diff((KIND_STATUSES, order_id), OrderStatus.list_from_response(response), _status_key)
+
+    @staticmethod
+    def _check(response, name, order_id):
+        """
+        :type response: merchantapi_client.client.Response
+        :raise: MerchantAPIException
+        """
+        code = response.get_http_code()
+        if response.get_error() is not None or not 200 <= code < 300:
+            raise MerchantAPIException('Can`t get %s for order %s: %s' % (name, order_id, response.get_error() or code))
+
+    def forget(self, order_id):
+        """
+        Прекращает отслеживание заказа, например после его завершения
+        :type order_id: int
+        """
+        self._seen.delete((KIND_COMMENTS, order_id))
+        self._seen.delete((KIND_STATUSES, order_id))
+
+    def clear(self):
+        self._seen.clear()
+
+    def __len__(self):
+        return len(self._seen)
+
+    def _diff(self, cache_key, entries, key):
+        """
+        :type cache_key: tuple
+        :type entries: list
+        :param key: Функция, возвращающая ключ записи
+        :type key: callable
+        :rtype: list
+        """
+        with self._lock:
+            seen = self._seen.get(cache_key)
+            if seen is None:
+                seen = frozenset()
+            new = [entry for entry in entries if key(entry) not in seen]
+            if new or not seen:
+                self._seen.set(cache_key, seen.union(key(entry) for entry in new))
+        return new
@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+import threading
+from importlib import import_module
+
+
+class LazyModule(object):
+    """
+    Модуль, загружаемый при первом обращении к его атрибутам. Позволяет не загружать при импорте пакета
+    зависимости, нужные только части методов, например ElementTree для клиентов, работающих с JSON
+    """
+
+    def __init__(self, *names):
+        """
+        :param names: Имена модулей в порядке предпочтения, загружается первый доступный
+        :type names: str
+        """
+        self._names = names
+        self._module = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        with self._lock:
+            if self._module is None:
+                for name in self._names[:-1]:
+                    try:
+                        self._module = import_module(name)
+                        break
+                    except ImportError:
+                        pass
+                else:
+                    self._module = import_module(self._names[-1])
+        return self._module
+
+    def __getattr__(self, name):
+        module = self._module if self._module is not None else self._load()
+        return getattr(module, name)
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+
+
+class AdaptiveConcurrencyLimiter(object):
+    """
+    Ограничитель количества одновременных запросов с адаптивным пределом (AIMD).
+    Время ответа усредняется с короткой и длинной памятью. Пока короткое среднее не превышает
+    длинное более чем в latency_tolerance раз и нет ошибок, предел растет на единицу за каждые limit
+    успешных запросов. При ошибке, ответе 429/5xx или росте времени ответа предел умножается
+    на backoff (не чаще раза за limit запросов)
+    """
+
+    def __init__(self, initial_limit=4, min_limit=1, max_limit=64, latency_tolerance=1.5, backoff=0.7,
+                 short_smoothing=0.2, long_smoothing=0.01):
+        """
+        :param initial_limit: Начальный предел
+        :type initial_limit: int
+        :param min_limit: Минимальный предел
+        :type min_limit: int
+        :param max_limit: Максимальный предел
+        :type max_limit: int
+        :param latency_tolerance: Допустимое отношение короткого среднего времени ответа к длинному
+        :type latency_tolerance: float
+        :param backoff: Множитель уменьшения предела
+        :type backoff: float
+        :param short_smoothing: Коэффициент сглаживания короткого среднего времени ответа
+        :type short_smoothing: float
+        :param long_smoothing: Коэффициент сглаживания длинного среднего, определяет скорость привыкания
+                               к устойчивому изменению времени ответа сервера
+        :type long_smoothing: float
+        """
+        if not 1 <= min_limit <= initial_limit <= max_limit:
+            raise ValueError('Limits must satisfy 1 <= min_limit <= initial_limit <= max_limit')
+        self._limit = float(initial_limit)
+        self._min_limit = min_limit
+        self._max_limit = max_limit
+        self._latency_tolerance = latency_tolerance
+        self._backoff = backoff
+        self._short_smoothing = short_smoothing
+        self._long_smoothing = long_smoothing
+        self._short_latency = None
+        self._long_latency = None
+        self._in_flight = 0
+        self._since_decrease = 0
+        self._condition = threading.Condition()
+
+    def get_limit(self):
+        """
+        :rtype: int
+        """
+        return int(self._limit)
+
+    def get_max_limit(self):
+        """
+        :rtype: int
+        """
+        return self._max_limit
+
+    def get_in_flight(self):
+        """
+        :rtype: int
+        """
+        return self._in_flight
+
+    def acquire(self):
+        """
+        Ожидает, пока количество выполняемых запросов станет меньше предела
+        :return: Время начала запроса для передачи в release
+        :rtype: float
+        """
+        with self._condition:
+            while self._in_flight >= int(self._limit):
+                self._condition.wait()
+            self._in_flight += 1
+        return time.time()
+
+    def release(self, started, success):
+        """
+        :param started: Значение, возвращенное acquire
+        :type started: float
+        :param success: Запрос выполнен без ошибки, 429 и 5xx
+        :type success: bool
+        """
+        latency = time.time() - started
+        with self._condition:
+            saturated = self._in_flight >= int(self._limit)
+            self._in_flight -= 1
+            self._since_decrease += 1
+            if success:
+                if self._long_latency is None:
+                    self._short_latency = self._long_latency = latency
+                else:
+                    self._short_latency += (latency - self._short_latency) * self._short_smoothing
+                    self._long_latency += (latency - self._long_latency) * self._long_smoothing
+            congested = not success or self._short_latency > self._long_latency * self._latency_tolerance
+            if congested:
+                if self._since_decrease >= self._limit:
+                    self._limit = max(self._min_limit, self._limit * self._backoff)
+                    self._since_decrease = 0
+            elif saturated:
+                self._limit = min(self._max_limit, self._limit + 1.0 / self._limit)
+            self._condition.notify_all()
@@ -0,0 +1,251 @@
+# -*- coding: utf-8 -*-
+import calendar
+import json
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from .MerchantAPIException import MerchantAPIException
+from .client import MerchantAPI
+from .batch import run_batch, DEFAULT_WORKERS
+from .pagination import iter_orders
+from .Entities.Order import Order
+from .Entities.OrderPackage import OrderPackage
+
+
+def _timestamp(date_time):
+    """
+    :type date_time: datetime or None
+    :rtype: float or None
+    """
+    if date_time is None:
+        return None
+    if date_time.tzinfo is not None:
+        return calendar.timegm(date_time.utctimetuple())
+    return time.mktime(date_time.timetuple())
+
+
+class OrderMirror(object):
+    """
+    Локальная копия заказов в файле SQLite с индексами по статусу, времени изменения, статусу доставки
+    и отправлениям. sync() загружает заказы, сменившие статус с момента предыдущей синхронизации, и повторно
+    загружает незавершенные заказы не реже раза в refresh_interval, так как смена статуса доставки или статуса
+    отправления не меняет время изменения заказа. Запросы find() и get_order() выполняются по локальной копии
+    без обращения к API
+    """
+
+    # Статусы заказов, у которых еще могут меняться статусы доставки и отправлений
+    OPEN_STATUSES = (MerchantAPI.STATUS_OPENED, MerchantAPI.STATUS_CONFIRMED)
+
+    _schema = """
+        CREATE TABLE IF NOT EXISTS orders (
+            id INTEGER PRIMARY KEY,
+            status TEXT,
+            delivery_status TEXT,
+            transition_time REAL,
+            data TEXT NOT NULL,
+            synced REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS orders_status ON orders (status, transition_time);
+        CREATE INDEX IF NOT EXISTS orders_transition_time ON orders (transition_time);
+        CREATE INDEX IF NOT EXISTS orders_delivery_status ON orders (delivery_status);
+        CREATE TABLE IF NOT EXISTS packages (
+            order_id INTEGER NOT NULL,
+            package_id TEXT NOT NULL,
+            service TEXT,
+            state TEXT,
+            PRIMARY KEY (order_id, package_id)
+        );
+        CREATE INDEX IF NOT EXISTS packages_package_id ON packages (package_id);
+        CREATE INDEX IF NOT EXISTS packages_state ON packages (state);
+        CREATE TABLE IF NOT EXISTS meta (
+            name TEXT PRIMARY KEY,
+            value TEXT
+        );
+    """
+
+    def __init__(self, api, path, page_size=100, max_workers=DEFAULT_WORKERS, overlap=300, refresh_interval=3600):
+        """
+        :type api: merchantapi_client.client.MerchantAPI
+        :param path: Путь к файлу базы
+        :type path: str
+        :param page_size: Размер страницы списка заказов
+        :type page_size: int
+        :param max_workers: Количество одновременных запросов при загрузке заказов
+        :type max_workers: int
+        :param overlap: Перекрытие окон синхронизации в секундах
+        :type overlap: float
+        :param refresh_interval: Максимальный возраст в секундах локальной копии незавершенного заказа,
+                                 None - не обновлять незавершенные заказы
+        :type refresh_interval: float or None
+        """
+        self._api = api
+        self._page_size = page_size
+        self._max_workers = max_workers
+        self._overlap = overlap
+        self._refresh_interval = refresh_interval
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript(self._schema)
+        self._lock = threading.Lock()
+
+    def get_last_sync(self):
+        """
+        :return: Время начала последней успешной синхронизации (unix time)
+        :rtype: float or None
+        """
+        with self._lock:
+            row = self._db.execute("SELECT value FROM meta WHERE name = 'last_sync'").fetchone()
+        return float(row[0]) if row else None
+
+    def _fetch(self, order_id):
+        """
+        Загружает заказ и его отправления и сохраняет их в базу
+        :rtype: merchantapi_client.client.Response
+        :raise: MerchantAPIException
+        """
+        response = self._api.method_get_order(order_id)
+        code = response.get_http_code()
+        if response.get_error() is not None or not 200 <= code < 300:
+            raise MerchantAPIException('Can`t get order %s: %s' % (order_id, response.get_error() or code))
+        # при ошибке заказ не сохраняется и загружается повторно, иначе store() удалил бы его отправления
+        packages_response = self._api.method_get_order_packages(order_id)
+        code = packages_response.get_http_code()
+        if packages_response.get_error() is not None or not 200 <= code < 300:
+            raise MerchantAPIException('Can`t get packages of order %s: %s' % (
+                order_id, packages_response.get_error() or code))
+        self.store(Order.from_response(response), OrderPackage.list_from_response(packages_response))
+        return response
+
+    def store(self, order, packages=None):
+        """
+        Сохраняет заказ и, если переданы, его отправления
+        :type order: Order
+        :type packages: list of OrderPackage or None
+        """
+        transition_time = _timestamp(order.updated_time) or time.time()
+        with self._lock:
+            with self._db:
+                self._db.execute('INSERT OR REPLACE INTO orders (id, status, delivery_status, transition_time, data, '
+                                 'synced) VALUES (?, ?, ?, ?, ?, ?)',
+                                 (order.id, order.status, order.delivery_status, transition_time,
+                                  json.dumps(order.get_data()), time.time()))
+                if packages is not None:
+                    self._db.execute('DELETE FROM packages WHERE order_id = ?', (order.id,))
+                    for package in packages:
+                        states = package.states or []
+                        state = states[-1].state if states else None
+                        self._db.execute('INSERT OR REPLACE INTO packages (order_id, package_id, service, state) '
+                                         'VALUES (?, ?, ?, ?)',
+                                         (order.id, str(package.package_id), package.service, state))
+
+    def sync(self):
+        """
+        Загружает заказы, сменившие статус с момента предыдущей синхронизации (при первом вызове - все заказы),
+        и незавершенные заказы, загруженные раньше чем refresh_interval назад
+        :rtype: merchantapi_client.batch.BatchResult
+        :raise: MerchantAPIException
+        """
+        started = time.time()
+        last_sync = self.get_last_sync()
+        filters = {}
+        if last_sync is not None:
+            filters['transition_date_from'] = datetime.fromtimestamp(last_sync - self._overlap)
+
+        def tasks():
+            changed = set()
+            for order in iter_orders(self._api, self._page_size, **filters):
+                changed.add(order.id)
+                yield order.id, (order.id,)
+            # заказы, поставленные в очередь выше, могут быть еще не загружены и выглядеть устаревшими
+            for order_id in self._get_stale_open_orders(started):
+                if order_id not in changed:
+                    yield order_id, (order_id,)
+
+        result = run_batch(self._fetch, tasks(), self._max_workers)
+        if not result.get_failed():
+            with self._lock:
+                with self._db:
+                    self._db.execute("INSERT OR REPLACE INTO meta (name, value) VALUES ('last_sync', ?)",
+                                     (repr(started),))
+        return result
+
+    def _get_stale_open_orders(self, now):
+        """
+        :rtype: list of int
+        """
+        if self._refresh_interval is None:
+            return []
+        marks = ','.join('?' * len(self.OPEN_STATUSES))
+        with self._lock:
+            rows = self._db.execute('SELECT id FROM orders WHERE status IN (%s) AND synced < ? ORDER BY synced' % marks,
+                                    list(self.OPEN_STATUSES) + [now - self._refresh_interval]).fetchall()
+        return [row[0] for row in rows]
+
+    def refresh(self, order_id):
+        """
+        Загружает заказ из API, минуя окно синхронизации
+        :type order_id: int
+        :rtype: Order
+        :raise: MerchantAPIException
+        """
+        self._fetch(order_id)
+        return self.get_order(order_id)
+
+    def get_order(self, order_id):
+        """
+        :type order_id: int
+        :rtype: Order or None
+        """
+        with self._lock:
+            row = self._db.execute('SELECT data FROM orders WHERE id = ?', (order_id,)).fetchone()
+        return Order(json.loads(row[0])) if row else None
+
+    def find(self, status=None, delivery_status=None, date_from=None, date_to=None, package_id=None,
+             package_state=None, limit=None):
+        """
+        Поиск заказов в локальной копии. Результат упорядочен по времени изменения. Статусы доставки
+        и отправлений незавершенных заказов могут отставать от API на время до refresh_interval
+        :type status: str or None
+        :type delivery_status: str or None
+        :param date_from: Начало диапазона времени изменения заказа
+        :type date_from: datetime or None
+        :param date_to: Конец диапазона времени изменения заказа
+        :type date_to: datetime or None
+        :type package_id: str or None
+        :param package_state: Последний статус отправления
+        :type package_state: str or None
+        :type limit: int or None
+        :rtype: list of Order
+        """
+        conditions = []
+        params = []
+        if status is not None:
+            conditions.append('o.status = ?')
+            params.append(status)
+        if delivery_status is not None:
+            conditions.append('o.delivery_status = ?')
+            params.append(delivery_status)
+        if date_from is not None:
+            conditions.append('o.transition_time >= ?')
+            params.append(_timestamp(date_from))
+        if date_to is not None:
+            conditions.append('o.transition_time <= ?')
+            params.append(_timestamp(date_to))
+        if package_id is not None:
+            conditions.append('o.id IN (SELECT order_id FROM packages WHERE package_id = ?)')
+            params.append(str(package_id))
+        if package_state is not None:
+            conditions.append('o.id IN (SELECT order_id FROM packages WHERE state = ?)')
+            params.append(package_state)
+        query = 'SELECT o.data FROM orders o'
+        if conditions:
+            query += ' WHERE ' + ' AND '.join(conditions)
+        query += ' ORDER BY o.transition_time'
+        if limit is not None:
+            query += ' LIMIT %d' % int(limit)
+        with self._lock:
+            rows = self._db.execute(query, params).fetchall()
+        return [Order(json.loads(row[0])) for row in rows]
+
+    def close(self):
+        self._db.close()
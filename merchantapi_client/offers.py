@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+from .MerchantAPIException import MerchantAPIException
+from .batch import run_batch, DEFAULT_WORKERS
+from .cache import TTLCache
+
+
+def split_evenly(items, chunk_size):
+    """
+    Делит список на минимальное количество частей не длиннее chunk_size с почти равными длинами
+    :type items: list
+    :type chunk_size: int
+    :rtype: list of list
+    """
+    if not items:
+        return []
+    count = (len(items) + chunk_size - 1) // chunk_size
+    size = (len(items) + count - 1) // count
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+class OfferAvailabilityLookup(object):
+    """
+    Пакетная проверка статуса и цены товаров через method_post_offers. Списки собственных идентификаторов
+    делятся на части, части для разных YML-файлов запрашиваются параллельно, ответы кешируются
+    по (yml_id, own_id, city) на короткое время
+    """
+
+    def __init__(self, api, chunk_size=100, ttl=60, max_workers=DEFAULT_WORKERS, max_cache_size=100000):
+        """
+        :type api: merchantapi_client.client.MerchantAPI
+        :param chunk_size: Максимальное количество идентификаторов в одном запросе
+        :type chunk_size: int
+        :param ttl: Время жизни записи кеша в секундах
+        :type ttl: float
+        :param max_workers: Количество одновременных запросов
+        :type max_workers: int
+        :param max_cache_size: Максимальное количество записей кеша
+        :type max_cache_size: int
+        """
+        self._api = api
+        self._chunk_size = chunk_size
+        self._max_workers = max_workers
+        self._cache = TTLCache(ttl, max_cache_size)
+
+    @staticmethod
+    def _parse(data):
+        """
+        :return: Сведения о товарах по собственным идентификаторам
+        :rtype: dict
+        """
+        if isinstance(data, dict):
+            data = data.get('offers', [])
+        offers = {}
+        if isinstance(data, list):
+            for offer in data:
+                if isinstance(offer, dict):
+                    own_id = offer.get('own_id', offer.get('ownId'))
+                    if own_id is not None:
+                        offers[str(own_id)] = offer
+        return offers
+
+    def _store(self, yml_id, own_ids, city, response):
+        """
+        Кеширует успешный ответ
+        :return: Сведения о запрошенных товарах по собственным идентификаторам, None для отсутствующих в ответе
+        :rtype: dict
+        :raise: MerchantAPIException
+        """
+        code = response.get_http_code()
+        if response.get_error() is not None or not 200 <= code < 300:
+            raise MerchantAPIException('Can`t get offers of YML %s: %s' % (yml_id, response.get_error() or code))
+        offers = self._parse(response.get_data())
+        found = {}
+        for own_id in own_ids:
+            found[own_id] = offers.get(own_id)
+            self._cache.set((yml_id, own_id, city), found[own_id])
+        return found
+
+    def lookup(self, own_ids, city=None):
+        """
+        Возвращает сведения о товарах. Для товаров, отсутствующих в ответе API, возвращается None
+        :param own_ids: Собственные идентификаторы товаров по идентификаторам YML-файлов
+        :type own_ids: dict
+        :param city: Город для получения информации по ценам
+        :type city: int or None
+        :return: Сведения о товарах по ключам (yml_id, own_id)
+        :rtype: dict
+        :raise: MerchantAPIException
+        """
+        result = {}
+        tasks = []
+        for yml_id, ids in own_ids.items():
+            missing = []
+            for own_id in ids:
+                key = (yml_id, str(own_id), city)
+                cached = self._cache.get(key, self)
+                if cached is not self:
+                    result[(yml_id, str(own_id))] = cached
+                else:
+                    missing.append(str(own_id))
+            for chunk in split_evenly(sorted(set(missing)), self._chunk_size):
+                tasks.append(((yml_id, chunk), (yml_id, chunk, city)))
+        error = None
+        if tasks:
+            # успешные части кешируются, даже если другие завершились ошибкой
+            for item in run_batch(self._api.method_post_offers, tasks, self._max_workers):
+                yml_id, chunk = item.get_key()
+                if item.get_error() is not None:
+                    error = error or item.get_error()
+                    continue
+                try:
+                    found = self._store(yml_id, chunk, city, item.get_response())
+                except MerchantAPIException as e:
+                    error = error or e
+                    continue
+                for own_id, offer in found.items():
+                    result[(yml_id, own_id)] = offer
+        if error is not None:
+            raise error
+        return result
+
+    def get(self, yml_id, own_id, city=None):
+        """
+        :type yml_id: int
+        :type own_id: str
+        :type city: int or None
+        :rtype: dict or None
+        :raise: MerchantAPIException
+        """
+        return self.lookup({yml_id: [own_id]}, city).get((yml_id, str(own_id)))
+
+    def clear(self):
+        self._cache.clear()
@@ -0,0 +1,354 @@
+# -*- coding: utf-8 -*-
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from .MerchantAPIException import MerchantAPIException
+from .batch import run_batch, DEFAULT_WORKERS
+from .compat import to_native
+from .client import get_DATE_W3C_format
+from .Entities.PostPackage import PostPackage
+from .Entities.PostPackageItem import PostPackageItem
+
+
+logger = logging.getLogger(__name__)
+
+
+def _encode_datetime(date_time):
+    return get_DATE_W3C_format(date_time) if isinstance(date_time, datetime) else None
+
+
+def _native(value):
+    """
+    Возвращает строки, прочитанные из JSON, к типу str. В Python 2 json.loads возвращает unicode,
+    который не проходит проверки аргументов клиента
+    """
+    if isinstance(value, list):
+        return [_native(item) for item in value]
+    if isinstance(value, dict):
+        return dict((_native(key), _native(item)) for key, item in value.items())
+    return to_native(value)
+
+
+def _decode_datetime(value):
+    if value is None:
+        return None
+    from dateutil.parser import parse
+    return parse(value)
+
+
+class WriteQueue(object):
+    """
+    Локальная очередь изменяющих запросов в файле SQLite. Запись сначала сохраняется в очередь,
+    а фоновый обработчик отправляет записи в порядке поступления отдельно для каждого заказа.
+    Записи остаются в очереди до успешной отправки, поэтому недоступность API не теряет изменения
+    и не блокирует вызывающий код. Одинаковые записи, ожидающие отправки, сохраняются один раз.
+    Аргументы проверяются при постановке в очередь, записи, которые клиент все же отклонил, помечаются ошибочными
+    """
+
+    _schema = """
+        CREATE TABLE IF NOT EXISTS writes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            dedupe_key TEXT NOT NULL,
+            order_id INTEGER,
+            method TEXT NOT NULL,
+            args TEXT NOT NULL,
+            created REAL NOT NULL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            error TEXT,
+            failed INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE INDEX IF NOT EXISTS writes_pending ON writes (failed, id);
+        CREATE UNIQUE INDEX IF NOT EXISTS writes_dedupe ON writes (dedupe_key) WHERE failed = 0;
+    """
+
+    # Повторяемые ответы: сервер недоступен или перегружен
+    _retry_codes = (429, 500, 502, 503, 504)
+
+    def __init__(self, api, path, batch_size=100, max_workers=DEFAULT_WORKERS, retry_interval=5):
+        """
+        :type api: merchantapi_client.client.MerchantAPI
+        :param path: Путь к файлу очереди
+        :type path: str
+        :param batch_size: Максимальное количество записей, выбираемых за один проход
+        :type batch_size: int
+        :param max_workers: Количество заказов, записи которых отправляются одновременно
+        :type max_workers: int
+        :param retry_interval: Пауза в секундах после прохода с неотправленными записями
+        :type retry_interval: float
+        """
+        self._api = api
+        self._batch_size = batch_size
+        self._max_workers = max_workers
+        self._retry_interval = retry_interval
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._migrate()
+        self._db.executescript(self._schema)
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def _migrate(self):
+        """
+        Очереди, созданные с уникальным dedupe_key для всех записей, пересоздаются с уникальностью
+        только среди ожидающих отправки записей
+        """
+        row = self._db.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'writes'").fetchone()
+        if row is None or 'dedupe_key TEXT NOT NULL UNIQUE' not in row[0]:
+            return
+        with self._db:
+            self._db.execute('ALTER TABLE writes RENAME TO writes_old')
+            self._db.execute('DROP INDEX IF EXISTS writes_pending')
+        self._db.executescript(self._schema)
+        with self._db:
+            self._db.execute('INSERT INTO writes SELECT * FROM writes_old')
+            self._db.execute('DROP TABLE writes_old')
+
+    def _enqueue(self, method, order_id, args, dedupe_key=None):
+        """
+        :return: Идентификатор записи или None, если такая запись уже ожидает отправки
+        :rtype: int or None
+        """
+        encoded = json.dumps(args, sort_keys=True)
+        if dedupe_key is None:
+            dedupe_key = hashlib.md5((method + '\n' + encoded).encode('utf-8')).hexdigest()
+        with self._lock:
+            with self._db:
+                cursor = self._db.execute(
+                    'INSERT OR IGNORE INTO writes (dedupe_key, order_id, method, args, created) VALUES (?, ?, ?, ?, ?)',
+                    (dedupe_key, order_id, method, encoded, time.time()))
+        self._wakeup.set()
+        return cursor.lastrowid if cursor.rowcount else None
+
+    def method_set_offers(self, offers, dedupe_key=None):
+        """
+        Постановка в очередь обновления товаров. Подряд идущие записи объединяются в один запрос
+        :type offers: list of dict
+        :rtype: int or None
+        """
+        if not isinstance(offers, list):
+            raise ValueError('Argument \'%s\' must be list' % offers)
+        return self._enqueue('method_set_offers', None, [offers], dedupe_key)
+
+    def method_set_order_status(self, order_id, status, reason_id, comment, dedupe_key=None):
+        """
+        :rtype: int or None
+        :raise: ValueError
+        """
+        self._api._validate_order_status(order_id, status, reason_id, comment)
+        return self._enqueue('method_set_order_status', order_id, [order_id, status, reason_id, comment], dedupe_key)
+
+    def method_order_add_comment(self, order_id, comment, dedupe_key=None):
+        """
+        :rtype: int or None
+        :raise: ValueError
+        """
+        self._api._validate_order_comment(order_id, comment)
+        return self._enqueue('method_order_add_comment', order_id, [order_id, comment], dedupe_key)
+
+    def method_create_appeal(self, order_id, subject_id, comment='', dedupe_key=None):
+        """
+        :rtype: int or None
+        :raise: ValueError
+        """
+        self._api._validate_appeal(order_id, subject_id, comment)
+        return self._enqueue('method_create_appeal', order_id, [order_id, subject_id, comment], dedupe_key)
+
+    def method_register_post_package(self, order_id, package, dedupe_key=None):
+        """
+        :type package: PostPackage
+        :rtype: int or None
+        :raise: ValueError
+        """
+        self._api._validate_post_package(order_id, package)
+        return self._enqueue('method_register_post_package', order_id, [order_id, package.get_attributes()],
+                             dedupe_key)
+
+    def method_set_order_delivery_state(self, order_id, state, date_time=None, dedupe_key=None):
+        """
+        Время изменения фиксируется в момент постановки в очередь
+        :rtype: int or None
+        :raise: ValueError
+        """
+        self._api._validate_delivery_state(order_id, state)
+        if not isinstance(date_time, datetime):
+            from dateutil.tz import tzlocal
+            date_time = datetime.now(tz=tzlocal())
+        return self._enqueue('method_set_order_delivery_state', order_id,
+                             [order_id, state, _encode_datetime(date_time)], dedupe_key)
+
+    def method_set_order_package_state(self, order_id, package_id, state, date_time=None, dedupe_key=None):
+        """
+        Время изменения фиксируется в момент постановки в очередь
+        :rtype: int or None
+        :raise: ValueError
+        """
+        self._api._validate_package_state(order_id, package_id, state)
+        if not isinstance(date_time, datetime):
+            from dateutil.tz import tzlocal
+            date_time = datetime.now(tz=tzlocal())
+        return self._enqueue('method_set_order_package_state', order_id,
+                             [order_id, package_id, state, _encode_datetime(date_time)], dedupe_key)
+
+    def get_pending_count(self):
+        """
+        :rtype: int
+        """
+        with self._lock:
+            return self._db.execute('SELECT COUNT(*) FROM writes WHERE failed = 0').fetchone()[0]
+
+    def get_failed(self):
+        """
+        Записи, отклоненные API без возможности повтора
+        :return: Кортежи (идентификатор, метод, аргументы, ошибка)
+        :rtype: list of tuple
+        """
+        with self._lock:
+            rows = self._db.execute('SELECT id, method, args, error FROM writes WHERE failed = 1 ORDER BY id').fetchall()
+        return [(row[0], row[1], json.loads(row[2]), row[3]) for row in rows]
+
+    def _call(self, method, args):
+        """
+        :rtype: merchantapi_client.client.Response
+        :raise: ValueError, MerchantAPIException
+        """
+        args = _native(args)
+        if method == 'method_register_post_package':
+            attributes = args[1]
+            args = [args[0], PostPackage(attributes['service'], attributes['packageId'], [
+                PostPackageItem(item['name'], item['quantity']) for item in attributes['items']])]
+        elif method in ('method_set_order_delivery_state', 'method_set_order_package_state'):
+            args = args[:-1] + [_decode_datetime(args[-1])]
+        return getattr(self._api, method)(*args)
+
+    def _finish(self, ids, response=None, error=None, rejected=False):
+        """
+        Удаляет отправленные записи или сохраняет ошибку
+        :param rejected: Запись отклонена клиентом, повтор не имеет смысла
+        :type rejected: bool
+        :return: Признак того, что следующие записи заказа можно отправлять
+        :rtype: bool
+        """
+        with self._lock:
+            with self._db:
+                marks = ','.join('?' * len(ids))
+                if rejected:
+                    self._db.execute('UPDATE writes SET failed = 1, attempts = attempts + 1, error = ? WHERE id IN (%s)'
+                                     % marks, [str(error)] + ids)
+                    return True
+                if error is None and 200 <= response.get_http_code() < 300:
+                    self._db.execute('DELETE FROM writes WHERE id IN (%s)' % marks, ids)
+                    return True
+                if error is None and response.get_http_code() not in self._retry_codes:
+                    self._db.execute('UPDATE writes SET failed = 1, attempts = attempts + 1, error = ? WHERE id IN (%s)'
+                                     % marks, [str(response.get_error() or response.get_http_code())] + ids)
+                    return True
+                self._db.execute('UPDATE writes SET attempts = attempts + 1, error = ? WHERE id IN (%s)' % marks,
+                                 [str(error or response.get_http_code())] + ids)
+                return False
+
+    def _send_group(self, rows):
+        """
+        Последовательно отправляет записи одного заказа или объединенные обновления товаров.
+        После неудачной отправки остальные записи группы откладываются до следующего прохода
+        :param rows: Кортежи (идентификаторы записей, метод, аргументы)
+        :type rows: list of tuple
+        :return: Количество записей, оставшихся неотправленными
+        :rtype: int
+        """
+        for index, (ids, method, args) in enumerate(rows):
+            rejected = False
+            try:
+                response, error = self._call(method, args), None
+            except MerchantAPIException as e:
+                response, error = None, e
+            except Exception as e:
+                logger.error('Write queue rejected %s %s: %s', method, ids, e)
+                response, error, rejected = None, e, True
+            if not self._finish(ids, response, error, rejected):
+                return sum(len(row[0]) for row in rows[index:])
+        return 0
+
+    def _load_groups(self):
+        with self._lock:
+            rows = self._db.execute('SELECT id, order_id, method, args FROM writes WHERE failed = 0 ORDER BY id LIMIT ?',
+                                    (self._batch_size,)).fetchall()
+        groups = {}
+        order = []
+        offers_ids, offers = [], []
+        for row_id, order_id, method, args in rows:
+            args = json.loads(args)
+            if method == 'method_set_offers':
+                offers_ids.append(row_id)
+                offers.extend(args[0])
+                continue
+            if order_id not in groups:
+                groups[order_id] = []
+                order.append(order_id)
+            groups[order_id].append(([row_id], method, args))
+        tasks = [(order_id, groups[order_id]) for order_id in order]
+        if offers_ids:
+            tasks.append(('offers', [(offers_ids, 'method_set_offers', [offers])]))
+        return tasks
+
+    def drain_once(self):
+        """
+        Отправляет одну порцию записей
+        :return: Количество отправленных (или окончательно отклоненных) записей и количество оставшихся
+                 в очереди записей порции
+        :rtype: tuple
+        """
+        tasks = self._load_groups()
+        total = sum(len(ids) for _, rows in tasks for ids, _, _ in rows)
+        left = [0]
+        lock = threading.Lock()
+
+        def send(rows):
+            count = self._send_group(rows)
+            with lock:
+                left[0] += count
+
+        run_batch(send, ((key, (rows,)) for key, rows in tasks), self._max_workers)
+        return total - left[0], left[0]
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            self._wakeup.clear()
+            try:
+                sent, left = self.drain_once()
+            except Exception as e:
+                logger.error('Write queue drain failed: %s', e)
+                sent, left = 0, 1
+            if left:
+                self._stop_event.wait(self._retry_interval)
+            elif not sent:
+                self._wakeup.wait(self._retry_interval)
+
+    def start(self):
+        """
+        Запускает фоновую отправку записей
+        """
+        if self._thread is not None:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        """
+        Останавливает фоновую отправку. Неотправленные записи остаются в очереди
+        """
+        self._stop_event.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def close(self):
+        self.stop()
+        self._db.close()
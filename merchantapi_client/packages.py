@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+import csv
+import io
+import os
+import threading
+from itertools import groupby
+from .compat import open_csv
+from .Entities.PostPackage import PostPackage
+from .Entities.PostPackageItem import PostPackageItem
+
+
+CSV_FIELDS = ['order_id', 'service', 'package_id', 'name', 'quantity']
+
+
+def rows_to_post_packages(rows):
+    """
+    Преобразует строки (order_id, service, package_id, items) в пары (order_id, PostPackage)
+    :param rows: Строки, items - список PostPackageItem или пар (название, количество)
+    :type rows: iterable of tuple
+    :rtype: generator
+    :raise: ValueError
+    """
+    for order_id, service, package_id, items in rows:
+        package_items = []
+        for item in items:
+            if not isinstance(item, PostPackageItem):
+                item = PostPackageItem(item[0], int(item[1]))
+            package_items.append(item)
+        yield int(order_id), PostPackage(service, package_id, package_items)
+
+
+def read_post_packages_csv(path, delimiter=','):
+    """
+    Читает отправления из CSV файла с заголовком order_id,service,package_id,name,quantity.
+    Каждая строка описывает один товар, идущие подряд строки одного отправления объединяются.
+    Файл читается построчно и не загружается в память целиком
+    :type path: str
+    :rtype: generator
+    :raise: ValueError
+    """
+    with open_csv(path) as f:
+        reader = csv.DictReader(f, delimiter=delimiter)
+        missing = [field for field in CSV_FIELDS if field not in (reader.fieldnames or [])]
+        if missing:
+            raise ValueError('CSV file \'%s\' has no columns: %s' % (path, ', '.join(missing)))
+
+        def package_key(row):
+            return row['order_id'], row['service'], row['package_id']
+
+        def rows():
+            for key, group in groupby(reader, package_key):
+                order_id, service, package_id = key
+                yield order_id, service, package_id, [(row['name'], row['quantity']) for row in group]
+
+        for item in rows_to_post_packages(rows()):
+            yield item
+
+
+class PackageProgressLog(object):
+    """
+    Журнал подтвержденных регистраций отправлений. Записи только дописываются в конец файла,
+    поэтому после сбоя повторный запуск пропускает уже зарегистрированные отправления
+    """
+
+    def __init__(self, path):
+        """
+        :param path: Путь к файлу журнала
+        :type path: str
+        """
+        self._path = path
+        self._done = set()
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            valid = 0
+            with io.open(path, 'rb') as f:
+                for line in f:
+                    if not line.endswith(b'\n'):
+                        break
+                    valid += len(line)
+                    self._done.add(line[:-1].decode('utf-8'))
+            # отбрасываем недописанную при сбое строку, иначе следующая запись склеится с ней
+            if valid != os.path.getsize(path):
+                with io.open(path, 'r+b') as f:
+                    f.truncate(valid)
+        self._file = io.open(path, 'a', encoding='utf-8')
+
+    @staticmethod
+    def _key(order_id, package_id):
+        return u'%s\t%s' % (order_id, package_id)
+
+    def is_done(self, order_id, package_id):
+        """
+        :rtype: bool
+        """
+        return self._key(order_id, package_id) in self._done
+
+    def mark_done(self, order_id, package_id):
+        key = self._key(order_id, package_id)
+        with self._lock:
+            if key in self._done:
+                return
+            self._done.add(key)
+            self._file.write(key + u'\n')
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        self._file.close()
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+from .MerchantAPIException import MerchantAPIException
+from .Entities.Order import Order
+
+
+def iter_order_pages(api, page_size=100, start_page=1, **filters):
+    """
+    Постранично читает список заказов через method_get_order_list
+    :type api: merchantapi_client.client.MerchantAPI
+    :param page_size: Количество заказов на странице
+    :type page_size: int
+    :param start_page: Номер первой читаемой страницы
+    :type start_page: int
+    :param filters: Фильтры method_get_order_list: status, transition_date_from, transition_date_to,
+                    transition_status
+    :return: Пары (номер страницы, список Order)
+    :rtype: generator
+    :raise: MerchantAPIException
+    """
+    page = start_page
+    while True:
+        response = api.method_get_order_list(page_size, page, **filters)
+        code = response.get_http_code()
+        if response.get_error() is not None or not 200 <= code < 300:
+            raise MerchantAPIException('Can`t get orders page %s: %s' % (page, response.get_error() or code))
+        orders = Order.list_from_response(response)
+        if orders:
+            yield page, orders
+        if len(orders) < page_size:
+            return
+        page += 1
+
+
+def iter_orders(api, page_size=100, start_page=1, **filters):
+    """
+    Последовательно возвращает заказы всех страниц списка
+    :type api: merchantapi_client.client.MerchantAPI
+    :rtype: generator of Order
+    :raise: MerchantAPIException
+    """
+    for _, orders in iter_order_pages(api, page_size, start_page, **filters):
+        for order in orders:
+            yield order
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+import threading
+from .client import MerchantAPI
+from .transport import HTTPTransport
+from .ratelimit import RateLimiter
+from .clock import ClockSkewEstimator
+
+
+class MerchantAPIPool(object):
+    """
+    Реестр клиентов для нескольких учетных записей магазина на одном хосте.
+    Клиенты используют общий пул соединений, общий ограничитель частоты запросов и общую оценку расхождения часов,
+    подпись запросов выполняется ключами своей учетной записи
+    """
+
+    def __init__(self, host, data_type=MerchantAPI.DATA_JSON, max_connections=20, rate=None, burst=None):
+        """
+        :param host: Хост Wikimart merchant API
+        :type host: str
+        :param data_type: Тип данных клиентов
+        :type data_type: str
+        :param max_connections: Размер общего пула соединений
+        :type max_connections: int
+        :param rate: Общее для всех учетных записей ограничение запросов в секунду, None - без ограничения
+        :type rate: float or None
+        :param burst: Максимальное количество запросов без ожидания
+        :type burst: float or None
+        """
+        self._host = host
+        self._data_type = data_type
+        self._transport = HTTPTransport(host, max_connections)
+        self._rate_limiter = RateLimiter(rate, burst) if rate is not None else None
+        self._clock = ClockSkewEstimator()
+        self._clients = {}
+        self._lock = threading.Lock()
+
+    def get_transport(self):
+        """
+        :rtype: HTTPTransport
+        """
+        return self._transport
+
+    def get_rate_limiter(self):
+        """
+        :rtype: RateLimiter or None
+        """
+        return self._rate_limiter
+
+    def add_account(self, name, app_id, app_secret):
+        """
+        Добавляет учетную запись и возвращает ее клиента. Клиент существующей учетной записи заменяется
+        :param name: Имя учетной записи в реестре
+        :type name: str
+        :param app_id: Идентификатор доступа
+        :param app_secret: Секретный ключ
+        :rtype: MerchantAPI
+        """
+        client = MerchantAPI(self._host, app_id, app_secret, self._data_type, transport=self._transport,
+                             rate_limiter=self._rate_limiter, clock=self._clock)
+        with self._lock:
+            self._clients[name] = client
+        return client
+
+    def remove_account(self, name):
+        """
+        :type name: str
+        :raise: KeyError
+        """
+        with self._lock:
+            del self._clients[name]
+
+    def get(self, name):
+        """
+        :type name: str
+        :rtype: MerchantAPI
+        :raise: KeyError
+        """
+        with self._lock:
+            return self._clients[name]
+
+    def get_names(self):
+        """
+        :rtype: list of str
+        """
+        with self._lock:
+            return list(self._clients)
+
+    def __contains__(self, name):
+        with self._lock:
+            return name in self._clients
+
+    def __len__(self):
+        return len(self._clients)
+
+    def close(self):
+        """
+        Закрывает свободные соединения общего пула
+        """
+        self._transport.close()
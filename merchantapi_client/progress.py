@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+import sys
+import threading
+import time
+
+
+class Progress(object):
+    """
+    Счетчик выполненных операций с периодическим выводом скорости обработки
+    """
+
+    def __init__(self, label, stream=None, interval=1.0, total=None):
+        """
+        :param label: Название операции в выводе
+        :type label: str
+        :param stream: Поток вывода, по умолчанию sys.stderr. None в сочетании с interval=0 отключает вывод
+        :param interval: Минимальный интервал между выводами в секундах
+        :type interval: float
+        :param total: Ожидаемое количество операций
+        :type total: int or None
+        """
+        self._label = label
+        self._stream = stream if stream is not None else sys.stderr
+        self._interval = interval
+        self._total = total
+        self._done = 0
+        self._failed = 0
+        self._started = time.time()
+        self._reported = 0
+        self._lock = threading.Lock()
+
+    def add(self, done=1, failed=0):
+        """
+        :param done: Количество выполненных операций
+        :type done: int
+        :param failed: Количество операций, завершившихся ошибкой
+        :type failed: int
+        """
+        with self._lock:
+            self._done += done
+            self._failed += failed
+            now = time.time()
+            if self._interval and now - self._reported >= self._interval:
+                self._reported = now
+                self._write()
+
+    def get_done(self):
+        """
+        :rtype: int
+        """
+        return self._done
+
+    def get_failed(self):
+        """
+        :rtype: int
+        """
+        return self._failed
+
+    def get_rate(self):
+        """
+        :return: Операций в секунду
+        :rtype: float
+        """
+        elapsed = time.time() - self._started
+        return self._done / elapsed if elapsed > 0 else 0.0
+
+    def _write(self):
+        total = '/%d' % self._total if self._total is not None else ''
+        self._stream.write('%s: %d%s done, %d failed, %.1f/s\n' % (self._label, self._done, total, self._failed,
+                                                                  self.get_rate()))
+        self._stream.flush()
+
+    def finish(self):
+        with self._lock:
+            self._write()
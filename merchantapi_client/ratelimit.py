@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+
+
+class RateLimiter(object):
+    """
+    Ограничитель частоты запросов по алгоритму token bucket. Может использоваться несколькими клиентами
+    """
+
+    def __init__(self, rate, burst=None):
+        """
+        :param rate: Допустимое количество запросов в секунду
+        :type rate: float
+        :param burst: Максимальное количество запросов, отправляемых без ожидания, не меньше 1. По умолчанию равно rate
+        :type burst: float or None
+        """
+        if rate <= 0:
+            raise ValueError('Argument \'%s\' must be positive' % rate)
+        if burst is not None and burst < 1:
+            raise ValueError('Argument \'burst\' must be >= 1')
+        self._rate = float(rate)
+        self._burst = float(burst if burst is not None else max(rate, 1))
+        self._tokens = self._burst
+        self._updated = time.time()
+        self._lock = threading.Lock()
+
+    def get_rate(self):
+        """
+        :rtype: float
+        """
+        return self._rate
+
+    def _refill(self):
+        now = time.time()
+        self._tokens = min(self._burst, self._tokens + (now - self._updated) * self._rate)
+        self._updated = now
+
+    def try_acquire(self):
+        """
+        Забирает разрешение на запрос, если оно доступно без ожидания
+        :rtype: bool
+        """
+        with self._lock:
+            self._refill()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            return False
+
+    def acquire(self):
+        """
+        Ожидает разрешения на запрос
+        """
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                delay = (1 - self._tokens) / self._rate
+            time.sleep(delay)
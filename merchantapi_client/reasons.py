@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+from .MerchantAPIException import MerchantAPIException
+from .cache import TTLCache
+from .Entities.OrderTransition import OrderTransition
+
+# Отметка в кеше о запрещенном переходе
+_NOT_ALLOWED = object()
+
+
+class StatusReasonResolver(object):
+    """
+    Кеширует причины смены статуса заказа. Набор причин зависит от текущего и устанавливаемого статусов,
+    поэтому method_get_order_status_reasons вызывается только для первого заказа с такой парой статусов.
+    Запрещенные переходы также кешируются
+    """
+
+    def __init__(self, api, ttl=600):
+        """
+        :type api: merchantapi_client.client.MerchantAPI
+        :param ttl: Время жизни записи кеша в секундах
+        :type ttl: float
+        """
+        self._api = api
+        self._cache = TTLCache(ttl)
+
+    def _load(self, order_id, current_status):
+        """
+        :raise: MerchantAPIException
+        """
+        response = self._api.method_get_order_status_reasons(order_id)
+        code = response.get_http_code()
+        if response.get_error() is not None or not 200 <= code < 300:
+            raise MerchantAPIException('Can`t get status reasons for order %s: %s' % (
+                order_id, response.get_error() or code))
+        for transition in OrderTransition.list_from_response(response):
+            self._cache.set((current_status, transition.status), transition.reasons or [])
+
+    def get_reasons(self, order_id, current_status, status):
+        """
+        Возвращает причины перехода заказа из статуса current_status в status
+        :param order_id: Идентификатор заказа, используется при отсутствии записи в кеше
+        :type order_id: int
+        :type current_status: str
+        :type status: str
+        :rtype: list of merchantapi_client.Entities.OrderStatusReason.OrderStatusReason
+        :raise: ValueError, MerchantAPIException
+        """
+        key = (current_status, status)
+        reasons = self._cache.get(key)
+        if reasons is None:
+            self._load(order_id, current_status)
+            reasons = self._cache.get(key)
+            if reasons is None:
+                reasons = _NOT_ALLOWED
+                self._cache.set(key, reasons)
+        if reasons is _NOT_ALLOWED:
+            raise ValueError('Transition from \'%s\' to \'%s\' is not allowed' % (current_status, status))
+        return reasons
+
+    def find_reason_id(self, order_id, current_status, status, reason):
+        """
+        Ищет идентификатор причины по ее идентификатору, коду или названию
+        :type order_id: int
+        :type current_status: str
+        :type status: str
+        :param reason: Идентификатор, код или название причины
+        :type reason: int or str
+        :rtype: int
+        :raise: ValueError, MerchantAPIException
+        """
+        for _ in range(2):
+            for item in self.get_reasons(order_id, current_status, status):
+                if reason in (item.id, item.code, item.name):
+                    return item.id
+            # набор причин мог измениться, перечитываем его один раз
+            self._cache.delete((current_status, status))
+        raise ValueError('Unknown reason \'%s\' for transition from \'%s\' to \'%s\'' % (reason, current_status, status))
+
+    def set_order_status(self, order_id, current_status, status, reason, comment):
+        """
+        Смена статуса заказа с выбором причины по коду или названию
+        :type order_id: int
+        :param current_status: Текущий статус заказа
+        :type current_status: str
+        :param status: Устанавливаемый статус
+        :type status: str
+        :param reason: Идентификатор, код или название причины
+        :type reason: int or str
+        :param comment: Комментарий к смене статуса
+        :type comment: str
+        :rtype: merchantapi_client.client.Response
+        :raise: ValueError, MerchantAPIException
+        """
+        reason_id = self.find_reason_id(order_id, current_status, status, reason)
+        return self._api.method_set_order_status(order_id, status, reason_id, comment)
+
+    def clear(self):
+        self._cache.clear()
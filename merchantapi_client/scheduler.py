@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+import threading
+from collections import deque
+
+
+PRIORITY_INTERACTIVE = 'interactive'
+PRIORITY_BULK = 'bulk'
+
+
+class _Waiter(object):
+
+    def __init__(self, tag):
+        self.tag = tag
+        self.event = threading.Event()
+
+
+class PriorityScheduler(object):
+    """
+    Планировщик запросов по классам приоритета. Ограничивает общее количество одновременных запросов
+    (capacity), резервирует часть мест за классами и распределяет остальные места между ожидающими
+    классами пропорционально весам (weighted fair queuing). Зарезервированные места класса
+    не могут быть заняты другими классами, поэтому интерактивные запросы не ждут завершения пакетных
+    """
+
+    def __init__(self, capacity=8, classes=None, default=PRIORITY_INTERACTIVE):
+        """
+        :param capacity: Общее количество одновременных запросов. Не должно превышать размер пула соединений
+        :type capacity: int
+        :param classes: Вес и количество зарезервированных мест по классам приоритета.
+                        По умолчанию {'interactive': (4, 2), 'bulk': (1, 0)}
+        :type classes: dict
+        :param default: Класс запросов, для которых приоритет не указан
+        :type default: str
+        :raise: ValueError
+        """
+        if classes is None:
+            classes = {PRIORITY_INTERACTIVE: (4, 2), PRIORITY_BULK: (1, 0)}
+        if default not in classes:
+            raise ValueError('Default priority \'%s\' is not in classes' % default)
+        reserved = sum(item[1] for item in classes.values())
+        if reserved > capacity:
+            raise ValueError('Reserved capacity %d exceeds capacity %d' % (reserved, capacity))
+        self._capacity = capacity
+        self._weights = dict((name, float(item[0])) for name, item in classes.items())
+        self._reserved = dict((name, item[1]) for name, item in classes.items())
+        self._shared = capacity - reserved
+        self._default = default
+        self._used = dict((name, 0) for name in classes)
+        self._queues = dict((name, deque()) for name in classes)
+        self._last_tag = dict((name, 0.0) for name in classes)
+        self._virtual_time = 0.0
+        self._lock = threading.Lock()
+
+    def get_default(self):
+        """
+        :rtype: str
+        """
+        return self._default
+
+    def get_in_flight(self):
+        """
+        :return: Количество выполняемых запросов по классам
+        :rtype: dict
+        """
+        with self._lock:
+            return dict(self._used)
+
+    def _shared_used(self):
+        return sum(max(0, self._used[name] - self._reserved[name]) for name in self._used)
+
+    def _can_run(self, name):
+        return self._used[name] < self._reserved[name] or self._shared_used() < self._shared
+
+    def _dispatch(self):
+        """
+        Выдает свободные места ожидающим запросам в порядке виртуального времени завершения
+        """
+        while True:
+            candidates = [name for name, queue in self._queues.items() if queue and self._can_run(name)]
+            if not candidates:
+                return
+            name = min(candidates, key=lambda item: self._queues[item][0].tag)
+            waiter = self._queues[name].popleft()
+            self._virtual_time = max(self._virtual_time, waiter.tag)
+            self._used[name] += 1
+            waiter.event.set()
+
+    def acquire(self, priority=None):
+        """
+        Ожидает места для запроса
+        :param priority: Класс приоритета, по умолчанию - default
+        :type priority: str or None
+        :return: Класс приоритета для передачи в release
+        :rtype: str
+        :raise: ValueError
+        """
+        name = priority or self._default
+        if name not in self._weights:
+            raise ValueError('Unknown priority \'%s\'' % name)
+        with self._lock:
+            tag = max(self._virtual_time, self._last_tag[name]) + 1.0 / self._weights[name]
+            self._last_tag[name] = tag
+            waiter = _Waiter(tag)
+            self._queues[name].append(waiter)
+            self._dispatch()
+        waiter.event.wait()
+        return name
+
+    def release(self, priority):
+        """
+        :param priority: Значение, возвращенное acquire
+        :type priority: str
+        """
+        with self._lock:
+            self._used[priority] -= 1
+            self._dispatch()
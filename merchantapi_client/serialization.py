@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+from collections import deque
+from .lazy import LazyModule
+from .batch import run_batch, DEFAULT_WORKERS
+
+hashlib = LazyModule('hashlib')
+json = LazyModule('json')
+ElementTree = LazyModule('xml.etree.ElementTree')
+
+
+DATA_JSON = 'json'
+DATA_XML = 'xml'
+
+
+def get_body_md5(body):
+    """
+    :type body: str or bytes or None
+    :rtype: str
+    """
+    md5_body = hashlib.new("md5")
+    if body is None:
+        body = ""
+    if not isinstance(body, bytes):
+        body = body.encode()
+    md5_body.update(body)
+    return str(md5_body.hexdigest())
+
+
+def get_offers_body(data_type, offers):
+    """
+    Тело запроса method_set_offers
+    :type data_type: str
+    :type offers: list of dict
+    :return: Тело запроса, для XML - bytes в кодировке UTF-8
+    :rtype: str or bytes
+    :raise: ValueError
+    """
+    if data_type == DATA_JSON:
+        return json.dumps({
+            "offers": offers
+        })
+    elif data_type == DATA_XML:
+        xml = ElementTree.Element('request')
+        offers_xml = ElementTree.SubElement(xml, 'offers')
+        for offer in offers:
+            offer_xml = ElementTree.SubElement(offers_xml, 'item')
+            ElementTree.SubElement(offer_xml, 'yml_id').text = str(offer['yml_id'])
+            ElementTree.SubElement(offer_xml, 'own_id').text = str(offer['own_id'])
+            if 'time' in offer:
+                ElementTree.SubElement(offer_xml, 'time').text = offer['time']
+            if 'available' in offer:
+                ElementTree.SubElement(offer_xml, 'available').text = str(int(offer['available']))
+            if 'stock' in offer:
+                ElementTree.SubElement(offer_xml, 'stock').text = str(offer['stock'])
+            if 'price' in offer:
+                ElementTree.SubElement(offer_xml, 'price').text = str(offer['price'])
+        return ElementTree.tostring(xml, 'utf-8')
+    raise ValueError("Unknown data type")
+
+
+def get_bundle_body(data_type, bundle):
+    """
+    Тело запросов method_bundle_create и method_bundle_update
+    :type data_type: str
+    :type bundle: merchantapi_client.Entities.PostBundle.PostBundle
+    :return: Тело запроса, для XML - bytes в кодировке UTF-8
+    :rtype: str or bytes
+    :raise: ValueError
+    """
+    if data_type == DATA_JSON:
+        return json.dumps(bundle.get_attributes())
+    elif data_type == DATA_XML:
+        xml = ElementTree.Element('request')
+        ElementTree.SubElement(xml, 'name').text = bundle.name
+        ElementTree.SubElement(xml, 'description').text = bundle.description
+        if bundle.start_time is not None:
+            ElementTree.SubElement(xml, 'startTime').text = bundle.start_time
+        if bundle.end_time is not None:
+            ElementTree.SubElement(xml, 'endTime').text = bundle.end_time
+        if bundle.is_available is not None:
+            ElementTree.SubElement(xml, 'isAvailable').text = str(int(bundle.is_available))
+        slots = ElementTree.SubElement(xml, 'slots')
+        for slot in bundle.slots:
+            slots_item = ElementTree.SubElement(slots, 'item')
+            ElementTree.SubElement(slots_item, 'isAnchor').text = str(int(slot.is_anchor))
+
+            offers = ElementTree.SubElement(slots_item, 'offers')
+            for offer in slot.offers:
+                offers_item = ElementTree.SubElement(offers, 'item')
+                ElementTree.SubElement(offers_item, 'ownId').text = str(offer.own_id)
+                if offer.yml_id is not None:
+                    ElementTree.SubElement(offers_item, 'ymlId').text = str(offer.yml_id)
+
+            if slot.bonus_type is not None and slot.bonus_amount is not None:
+                bonus = ElementTree.SubElement(slots_item, 'type')
+                ElementTree.SubElement(bonus, 'type').text = slot.bonus_type
+                ElementTree.SubElement(bonus, 'value').text = str(slot.bonus_amount)
+        if bundle.bonus_type is not None and bundle.bonus_amount is not None:
+            bonus = ElementTree.SubElement(xml, 'bonus')
+            ElementTree.SubElement(bonus, 'type').text = bundle.bonus_type
+            ElementTree.SubElement(bonus, 'value').text = str(bundle.bonus_amount)
+        return ElementTree.tostring(xml, 'utf-8')
+    raise ValueError('Unknown data type')
+
+
+def _encode(task):
+    """
+    Выполняется в процессе пула: сериализует часть данных
+    :return: Тело запроса и MD5 тела
+    :rtype: tuple
+    """
+    kind, data_type, data = task
+    if kind == 'offers':
+        body = get_offers_body(data_type, data)
+    else:
+        body = get_bundle_body(data_type, data)
+    return body, get_body_md5(body)
+
+
+def _chunks(items, size):
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class ParallelSerializer(object):
+    """
+    Сериализация больших списков товаров и множества бандлов в пуле процессов. Части сериализуются
+    параллельно на нескольких ядрах и возвращаются в исходном порядке. Входные данные читаются
+    по мере потребления результатов, в работе одновременно не больше max_pending частей
+    """
+
+    def __init__(self, processes=None, max_pending=None):
+        """
+        :param processes: Количество процессов, по умолчанию - количество ядер
+        :type processes: int or None
+        :param max_pending: Максимальное количество частей в работе и готовых к выдаче,
+                            по умолчанию - удвоенное количество процессов
+        :type max_pending: int or None
+        """
+        from multiprocessing import Pool, cpu_count
+        self._pool = Pool(processes)
+        self._max_pending = max_pending or 2 * (processes or cpu_count())
+
+    def _imap(self, tasks):
+        """
+        Упорядоченная обработка задач с ограничением количества незавершенных
+        :rtype: generator
+        """
+        pending = deque()
+        for task in tasks:
+            pending.append(self._pool.apply_async(_encode, (task,)))
+            if len(pending) >= self._max_pending:
+                yield pending.popleft().get()
+        while pending:
+            yield pending.popleft().get()
+
+    def iter_offer_bodies(self, data_type, offers, chunk_size=1000):
+        """
+        Сериализует товары частями по chunk_size
+        :type data_type: str
+        :type offers: iterable of dict
+        :type chunk_size: int
+        :return: Пары (тело запроса method_set_offers, MD5 тела)
+        :rtype: generator
+        """
+        return self._imap(('offers', data_type, chunk) for chunk in _chunks(offers, chunk_size))
+
+    def iter_bundle_bodies(self, data_type, bundles):
+        """
+        :type data_type: str
+        :type bundles: iterable of merchantapi_client.Entities.PostBundle.PostBundle
+        :return: Пары (тело запроса, MD5 тела) в порядке бандлов
+        :rtype: generator
+        """
+        return self._imap(('bundle', data_type, bundle) for bundle in bundles)
+
+    def close(self):
+        self._pool.close()
+        self._pool.join()
+
+
+def upload_offers(api, offers, serializer=None, chunk_size=1000, max_workers=DEFAULT_WORKERS):
+    """
+    Отправляет товары частями по chunk_size. Сериализация следующих частей выполняется
+    одновременно с отправкой предыдущих
+    :type api: merchantapi_client.client.MerchantAPI
+    :type offers: iterable of dict
+    :param serializer: Пул сериализации. Если не задан, части сериализуются в текущем процессе
+    :type serializer: ParallelSerializer or None
+    :type chunk_size: int
+    :param max_workers: Количество одновременных запросов
+    :type max_workers: int
+    :return: Отчет, ключ элемента - порядковый номер части
+    :rtype: merchantapi_client.batch.BatchResult
+    """
+    data_type = api.get_data_type()
+    if serializer is not None:
+        bodies = serializer.iter_offer_bodies(data_type, offers, chunk_size)
+    else:
+        bodies = ((body, get_body_md5(body)) for body in
+                  (get_offers_body(data_type, chunk) for chunk in _chunks(offers, chunk_size)))
+    return run_batch(api._put_offers, ((index, body) for index, body in enumerate(bodies)), max_workers)
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+import threading
+
+
+class _Call(object):
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight(object):
+    """
+    Объединяет одновременные одинаковые вызовы: пока выполняется вызов с некоторым ключом,
+    остальные вызовы с тем же ключом ожидают его завершения и получают тот же результат
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, func):
+        """
+        :param key: Ключ вызова
+        :param func: Вызываемый объект без аргументов
+        :return: Результат func, общий для всех одновременных вызовов с ключом key
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = func()
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+
+    def get_in_flight_count(self):
+        """
+        :rtype: int
+        """
+        return len(self._calls)
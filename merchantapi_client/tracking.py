@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+from datetime import datetime
+import threading
+from dateutil.tz import tzlocal
+from .batch import run_batch, BatchItemResult, BatchResult, DEFAULT_WORKERS
+from .cache import TTLCache
+
+
+class StateEvent(object):
+    """
+    Событие изменения статуса доставки заказа или статуса отправления
+    """
+
+    def __init__(self, order_id, state, update_time=None, package_id=None):
+        """
+        :param order_id: Идентификатор заказа
+        :type order_id: int
+        :param state: Новый статус
+        :type state: str
+        :param update_time: Время изменения статуса, без часового пояса - локальное время
+        :type update_time: datetime or None
+        :param package_id: Идентификатор отправления. Если не указан, событие меняет статус доставки заказа
+        :type package_id: int or None
+        :raise: ValueError
+        """
+        if not isinstance(order_id, int):
+            raise ValueError('Argument \'%s\' must be integer' % order_id)
+        if package_id is not None and not isinstance(package_id, int):
+            raise ValueError('Argument \'%s\' must be integer' % package_id)
+        if not isinstance(state, str):
+            raise ValueError('Argument \'%s\' must be string' % state)
+        if not isinstance(update_time, datetime):
+            update_time = datetime.now(tz=tzlocal())
+        elif update_time.tzinfo is None:
+            # время без часового пояса считается локальным, чтобы события можно было сравнивать между собой
+            update_time = update_time.replace(tzinfo=tzlocal())
+        self.order_id = order_id
+        self.package_id = package_id
+        self.state = state
+        self.update_time = update_time
+
+    def get_key(self):
+        """
+        :return: Заказ и отправление, к которым относится событие
+        :rtype: tuple
+        """
+        return self.order_id, self.package_id
+
+
+class StateEventResult(BatchItemResult):
+    """
+    Результат обработки события трекинга. Событие либо отправлено, либо вытеснено более поздним событием
+    того же заказа или отправления и не отправлялось
+    """
+
+    def __init__(self, event, response=None, error=None, superseded=False):
+        """
+        :type event: StateEvent
+        :type response: merchantapi_client.client.Response or None
+        :type error: Exception or None
+        :param superseded: Событие вытеснено более поздним
+        :type superseded: bool
+        """
+        BatchItemResult.__init__(self, event.get_key(), response, error)
+        self._event = event
+        self._superseded = superseded
+
+    def get_event(self):
+        """
+        :rtype: StateEvent
+        """
+        return self._event
+
+    def is_superseded(self):
+        """
+        :rtype: bool
+        """
+        return self._superseded
+
+    def is_success(self):
+        """
+        Вытесненное событие считается успешным, так как повторно отправлять его не нужно
+        :rtype: bool
+        """
+        return self._superseded or BatchItemResult.is_success(self)
+
+    def __repr__(self):
+        if self._superseded:
+            return '<StateEventResult %r superseded>' % (self.get_key(),)
+        return '<StateEventResult %r success=%r>' % (self.get_key(), self.is_success())
+
+
+class StateUpdateBatcher(object):
+    """
+    Сворачивает поток событий трекинга до последнего по updateTime события для каждого заказа или отправления
+    и отправляет итоговые изменения параллельно. Время последнего отправленного события запоминается для
+    max_sent заказов и отправлений, и более старые события, пришедшие позже, не отправляются
+    """
+
+    def __init__(self, api, max_workers=DEFAULT_WORKERS, flush_size=10000, max_sent=100000):
+        """
+        :type api: merchantapi_client.client.MerchantAPI
+        :param max_workers: Максимальное количество одновременных запросов
+        :type max_workers: int
+        :param flush_size: Количество различных заказов/отправлений, при накоплении которого process отправляет изменения
+        :type flush_size: int
+        :param max_sent: Количество заказов/отправлений, для которых запоминается время последнего отправленного
+                         события
+        :type max_sent: int
+        """
+        self._api = api
+        self._max_workers = max_workers
+        self._flush_size = flush_size
+        self._pending = {}
+        self._superseded = []
+        self._sent = TTLCache(max_size=max_sent)
+        self._lock = threading.Lock()
+
+    def add(self, event):
+        """
+        :type event: StateEvent
+        """
+        key = event.get_key()
+        with self._lock:
+            sent = self._sent.get(key)
+            current = self._pending.get(key)
+            if sent is not None and event.update_time < sent:
+                self._superseded.append(StateEventResult(event, superseded=True))
+            elif current is None or current.update_time <= event.update_time:
+                if current is not None:
+                    self._superseded.append(StateEventResult(current, superseded=True))
+                self._pending[key] = event
+            else:
+                self._superseded.append(StateEventResult(event, superseded=True))
+
+    def get_pending_count(self):
+        """
+        :rtype: int
+        """
+        return len(self._pending)
+
+    def _send(self, event):
+        if event.package_id is None:
+            return self._api.method_set_order_delivery_state(event.order_id, event.state, event.update_time)
+        return self._api.method_set_order_package_state(event.order_id, event.package_id, event.state,
+                                                        event.update_time)
+
+    def flush(self):
+        """
+        Отправляет накопленные изменения
+        :return: Отчет по каждому событию, добавленному после предыдущей отправки, включая вытесненные.
+                 Ключ элемента - кортеж (order_id, package_id)
+        :rtype: merchantapi_client.batch.BatchResult
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            items, self._superseded = self._superseded, []
+        result = run_batch(self._send, ((event, (event,)) for event in pending.values()), self._max_workers)
+        for item in result:
+            event = item.get_key()
+            item = StateEventResult(event, item.get_response(), item.get_error())
+            if item.is_success():
+                with self._lock:
+                    sent = self._sent.get(event.get_key())
+                    if sent is None or sent < event.update_time:
+                        self._sent.set(event.get_key(), event.update_time)
+            items.append(item)
+        return BatchResult(items)
+
+    def process(self, events):
+        """
+        Обрабатывает поток событий, отправляя изменения каждый раз, когда накоплено flush_size ключей
+        :type events: iterable of StateEvent
+        :return: Отчет по каждому событию потока
+        :rtype: merchantapi_client.batch.BatchResult
+        """
+        items = []
+        for event in events:
+            self.add(event)
+            if len(self._pending) >= self._flush_size:
+                items.extend(self.flush().get_items())
+        items.extend(self.flush().get_items())
+        return BatchResult(items)
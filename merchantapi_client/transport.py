@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+import errno
+import socket
+import threading
+try:
+    from httplib import HTTPConnection, BadStatusLine
+except ImportError:
+    from http.client import HTTPConnection, BadStatusLine
+
+# Методы, повтор которых не меняет результат
+IDEMPOTENT_METHODS = ('GET', 'HEAD', 'DELETE')
+
+
+class _SendError(Exception):
+    """
+    Ошибка при отправке запроса, до получения ответа
+    """
+
+    def __init__(self, error):
+        Exception.__init__(self, str(error))
+        self.error = error
+
+
+def _is_stale_connection_error(error):
+    """
+    Признак ошибки соединения, закрытого сервером
+    :type error: Exception
+    :rtype: bool
+    """
+    if isinstance(error, BadStatusLine):
+        return True
+    return isinstance(error, socket.error) and getattr(error, 'errno', None) in (errno.EPIPE, errno.ECONNRESET,
+                                                                                  errno.ECONNABORTED)
+
+
+class HTTPTransport(object):
+    """
+    HTTP транспорт с пулом постоянных (keep-alive) соединений к одному хосту
+    """
+
+    def __init__(self, host, max_connections=10, timeout=None):
+        """
+        :param host: Хост Wikimart merchant API
+        :type host: str
+        :param max_connections: Максимальное количество одновременно открытых соединений
+        :type max_connections: int
+        :param timeout: Таймаут соединения в секундах
+        :type timeout: float or None
+        """
+        if not isinstance(max_connections, int) or max_connections < 1:
+            raise ValueError('Argument \'%s\' must be positive integer' % max_connections)
+        self._host = host
+        self._timeout = timeout
+        self._max_connections = max_connections
+        self._slots = threading.BoundedSemaphore(max_connections)
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def get_host(self):
+        """
+        :rtype: str
+        """
+        return self._host
+
+    def get_max_connections(self):
+        """
+        :rtype: int
+        """
+        return self._max_connections
+
+    def _new_connection(self):
+        if self._timeout is None:
+            return HTTPConnection(self._host)
+        return HTTPConnection(self._host, timeout=self._timeout)
+
+    def _acquire(self):
+        """
+        :return: Соединение и признак того, что оно уже использовалось
+        :rtype: tuple
+        """
+        self._slots.acquire()
+        with self._lock:
+            if self._idle:
+                return self._idle.pop(), True
+        return self._new_connection(), False
+
+    def _release(self, connection, reusable):
+        if reusable:
+            with self._lock:
+                self._idle.append(connection)
+        else:
+            connection.close()
+        self._slots.release()
+
+    def request(self, method, uri, body, headers):
+        """
+        Выполняет запрос и полностью вычитывает ответ
+        :type method: str
+        :type uri: str
+        :type body: str or None
+        :type headers: dict
+        :return: HTTP код, заголовки ответа (имена в нижнем регистре) и тело ответа
+        :rtype: tuple
+        """
+        connection, reused = self._acquire()
+        try:
+            try:
+                status, response_headers, data, reusable = self._send(connection, method, uri, body, headers)
+            except Exception as e:
+                connection.close()
+                if not reused or not self._can_retry(method, e):
+                    raise
+                # соединение из пула могло быть закрыто сервером, повторяем на новом
+                connection = self._new_connection()
+                status, response_headers, data, reusable = self._send(connection, method, uri, body, headers)
+        except _SendError as e:
+            connection.close()
+            self._slots.release()
+            raise e.error
+        except Exception:
+            connection.close()
+            self._slots.release()
+            raise
+        self._release(connection, reusable)
+        return status, response_headers, data
+
+    @staticmethod
+    def _can_retry(method, error):
+        """
+        Запрос на соединении из пула повторяется, только если сервер закрыл соединение. Неидемпотентные
+        запросы повторяются, только если ошибка возникла при отправке, иначе сервер мог уже выполнить запрос
+        :type method: str
+        :type error: Exception
+        :rtype: bool
+        """
+        if isinstance(error, _SendError):
+            return _is_stale_connection_error(error.error)
+        return method in IDEMPOTENT_METHODS and _is_stale_connection_error(error)
+
+    @staticmethod
+    def _send(connection, method, uri, body, headers):
+        """
+        :raise: _SendError при ошибке отправки запроса
+        """
+        try:
+            if body is None:
+                connection.request(method, uri, headers=headers)
+            else:
+                connection.request(method, uri, body, headers)
+        except Exception as e:
+            raise _SendError(e)
+        resp = connection.getresponse()
+        data = resp.read()
+        response_headers = dict((name.lower(), value) for name, value in resp.getheaders())
+        reusable = not resp.will_close
+        return resp.status, response_headers, data, reusable
+
+    def close(self):
+        """
+        Закрывает все свободные соединения пула
+        """
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection in idle:
+            connection.close()
@@ -9,6 +9,7 @@ from merchantapi_client.Entities.PostPackageItem import PostPackageItem
 from merchantapi_client.Entities.PostBundle import PostBundle
 from merchantapi_client.Entities.PostBundleSlot import PostBundleSlot
 from merchantapi_client.Entities.PostBundleSlotOffer import PostBundleSlotOffer
+from merchantapi_client.Entities.Order import Order
 
 
 def print_response(response):
@@ -24,6 +25,10 @@ mapi = MerchantAPI("merchant.wikimart.ru", "APP_ID", "SECRET_KEY", MerchantAPI.D
 response = mapi.method_get_order_list(10, 1)
 print_response(response)
 
+# типизированный доступ к заказам, вложенные поля разбираются при первом обращении
+for order in Order.list_from_response(response):
+    print(order.id, order.status)
+
 package = PostPackage(
     "ems", "ZX0123456789", [
         PostPackageItem("Laptop NoName 13", 1), PostPackageItem("Flash drive 16Gb", 3)